@@ -10,16 +10,15 @@ if str(src_path) not in sys.path:
     sys.path.insert(0, str(src_path))
 
 from ArgParser import parseArgs
-from game_of_life_action.engine import GameOfLifeEngine
+from game_of_life_action.engine import GameOfLifeEngine, run_themes
 
 
 if __name__ == "__main__":
-    for settings in parseArgs():
-        try:
-            engine = GameOfLifeEngine(settings)
-            engine.run()
-        except KeyboardInterrupt as exc:
-            raise SystemExit(130) from exc
-        except Exception as exc:
-            print("Game of Life failed:", exc)
-            raise SystemExit(1) from exc
+    themes = parseArgs()
+    try:
+        run_themes([GameOfLifeEngine(settings) for settings in themes])
+    except KeyboardInterrupt as exc:
+        raise SystemExit(130) from exc
+    except Exception as exc:
+        print("Game of Life failed:", exc)
+        raise SystemExit(1) from exc
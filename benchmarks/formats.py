@@ -0,0 +1,50 @@
+"""Compare encode time and output size of the -format animation writers.
+
+Starts a random board on the default canvas and grid, then animates it with
+``-gif`` once per format:
+
+    python benchmarks/formats.py [-gifLength N] [-seed N] [-workers N]
+
+The arguments (default ``-gifLength 30 -seed 1``) are passed to every run;
+``-seed`` also picks the starting board.
+"""
+from __future__ import annotations
+
+import contextlib
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from game_of_life_action.animation import WRITERS
+from game_of_life_action.config import parse_args
+from game_of_life_action.engine import GameOfLifeEngine
+
+
+def _run(argv: list[str], folder: Path) -> None:
+    settings = parse_args(argv, default_path=folder)
+    with contextlib.redirect_stdout(io.StringIO()):
+        GameOfLifeEngine(settings).run()
+
+
+def main(argv: list[str]) -> None:
+    extra = argv or ["-gifLength", "30", "-seed", "1"]
+    with tempfile.TemporaryDirectory(prefix="gol-bench-") as tmp:
+        folder = Path(tmp)
+        seed = extra[extra.index("-seed") : extra.index("-seed") + 2] if "-seed" in extra else []
+        _run(["-p", tmp, *seed], folder)
+        board = folder / "GameOfLife.png"
+        print(f"{'format':8}{'seconds':>10}{'bytes':>14}")
+        for name, writer in WRITERS.items():
+            started = time.perf_counter()
+            _run(["-p", tmp, "-gif", str(board), "-format", name, *extra], folder)
+            seconds = time.perf_counter() - started
+            size = board.with_suffix(writer.suffix).stat().st_size
+            print(f"{name:8}{seconds:10.2f}{size:14,}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,447 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import struct
+import tempfile
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:  # frames arrive as images; the writers never import PIL themselves
+    from PIL import Image
+
+# ---------------------------------------------------------------------------
+# Streaming animation writers
+# ---------------------------------------------------------------------------
+#
+# Pillow's ``save(save_all=True, append_images=...)`` needs every frame as a
+# decoded image up front.  The writers here instead encode each frame once
+# with Pillow, keep only the encoded frame data in an unnamed spool file and
+# copy it into the output container in any order:
+#
+#   frame = writer.encode(image, box, base)  # store a frame, return its handle
+#   writer.write(frame, duration)            # append a stored frame (ms)
+#
+# Held or mirrored frames are written as copies of the stored data, so memory
+# stays bounded by one frame whatever the length.  Frames with the same
+# pixels are stored once, and a frame written twice in a row is merged into
+# one with the summed duration (split again where it would overflow the
+# container's delay field).  With *box* (left, upper, right, lower) only
+# that part of the canvas is stored and drawn over the previous frame; with
+# *base*, the frame it is drawn over, a GIF frame leaves the pixels that match
+# *base* transparent, which LZW compresses far better than the pixels.  The
+# animation is written next to *path* and only replaces it once complete, so
+# an animation can be extended in place while its frames are still read.
+#
+# ``encode`` is ``store(prepare(image, box, base))``: ``prepare`` is a classmethod
+# without side effects, so frames can be encoded in worker processes and
+# stored by the parent in order.
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+def _riff_chunk(kind: bytes, data: bytes) -> bytes:
+    return kind + struct.pack("<I", len(data)) + data + (b"\x00" if len(data) % 2 else b"")
+
+
+@dataclass(slots=True)
+class EncodedFrame:
+    key: bytes
+    size: tuple[int, int]
+    box: tuple[int, int, int, int]
+    data: bytes
+    meta: tuple
+
+
+class AnimationWriter:
+    """Base class of the streaming writers; see the module comment."""
+
+    name = ""
+    suffix = ""
+    # longest delay (ms) one frame of the container can hold
+    max_duration = 0
+
+    def __init__(self, path: Path, loop: int = 0) -> None:
+        self.path = path
+        self.loop = loop
+        self.frames_encoded = 0
+        self.frames_written = 0
+        self._spool = tempfile.TemporaryFile()
+        self._blocks: list[tuple[int, int, tuple]] = []
+        self._known: dict[bytes, int] = {}
+        self._pending: tuple[int, int] | None = None
+        self._last: tuple[int, bytes] | None = None
+        self._out: io.BufferedRandom | None = None
+        self.size = (0, 0)
+
+    def __enter__(self) -> AnimationWriter:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close(discard=exc_type is not None)
+
+    def encode(
+        self,
+        image: Image.Image,
+        box: tuple[int, int, int, int] | None = None,
+        base: Image.Image | None = None,
+    ) -> int:
+        """Store *image* (or its *box*, drawn over *base*) and return a
+        handle for ``write``."""
+        return self.store(self.prepare(image, box, base))
+
+    @classmethod
+    def prepare(
+        cls,
+        image: Image.Image,
+        box: tuple[int, int, int, int] | None = None,
+        base: Image.Image | None = None,
+    ) -> EncodedFrame:
+        """Encode *image* (or its *box*, drawn over *base*) without storing it."""
+        box = cls._align(box or (0, 0, *image.size))
+        frame = image if box == (0, 0, *image.size) else image.crop(box)
+        if base is not None:
+            frame = cls._over(frame, base if box == (0, 0, *base.size) else base.crop(box))
+
+        key = hashlib.blake2b(digest_size=16)
+        key.update(f"{frame.mode}{box}".encode())
+        if frame.palette is not None:
+            key.update(frame.palette.tobytes())
+        key.update(frame.tobytes())
+        data, meta = cls._encode_frame(frame)
+        return EncodedFrame(key.digest(), image.size, box, data, meta)
+
+    def store(self, frame: EncodedFrame) -> int:
+        """Keep an encoded *frame* and return a handle for ``write``; frames
+        with the same pixels share one handle."""
+        if self._out is None:
+            self.size = frame.size
+            self._out = open(self._partial, "w+b")
+            self._open()
+        handle = self._known.get(frame.key)
+        if handle is not None:
+            return handle
+
+        offset = self._spool.seek(0, io.SEEK_END)
+        self._spool.write(frame.data)
+        self._blocks.append((offset, len(frame.data), (frame.box, *frame.meta)))
+        handle = self._known[frame.key] = len(self._blocks) - 1
+        self._last = (handle, frame.data)
+        self.frames_encoded += 1
+        return handle
+
+    def write(self, frame: int, duration: int) -> None:
+        """Append stored *frame* to the animation, shown for *duration* ms."""
+        if self._pending is not None and self._pending[0] == frame:
+            duration += self._pending[1]
+            if duration <= self.max_duration:
+                self._pending = (frame, duration)
+                return
+            # the merged delay does not fit: show the frame again
+            self._pending = (frame, self.max_duration)
+            duration -= self.max_duration
+        self._flush()
+        while duration > self.max_duration:
+            self._pending = (frame, self.max_duration)
+            self._flush()
+            duration -= self.max_duration
+        self._pending = (frame, duration)
+
+    def close(self, discard: bool = False) -> None:
+        """Finish the animation and move it to *path* (or drop it)."""
+        if self._out is not None:
+            if not discard:
+                self._flush()
+                self._finish()
+            self._out.close()
+            self._out = None
+            if discard:
+                os.unlink(self._partial)
+            else:
+                os.replace(self._partial, self.path)
+        self._spool.close()
+
+    @property
+    def _partial(self) -> Path:
+        return self.path.with_name(self.path.name + ".part")
+
+    def _flush(self) -> None:
+        if self._pending is None:
+            return
+        frame, duration = self._pending
+        self._pending = None
+        offset, length, meta = self._blocks[frame]
+        if self._last is not None and self._last[0] == frame:
+            block = self._last[1]
+        else:
+            self._spool.seek(offset)
+            block = self._spool.read(length)
+        assert self._out is not None
+        self._write_frame(block, meta, duration)
+        self.frames_written += 1
+
+    # -- container specific ----------------------------------------------------
+
+    @classmethod
+    def _align(cls, box: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        return box
+
+    @classmethod
+    def _over(cls, frame: Image.Image, base: Image.Image) -> Image.Image:
+        """Return *frame* as drawn over the same part of *base*."""
+        return frame
+
+    def _open(self) -> None:
+        raise NotImplementedError
+
+    @classmethod
+    def _encode_frame(cls, frame: Image.Image) -> tuple[bytes, tuple]:
+        raise NotImplementedError
+
+    def _write_frame(self, block: bytes, meta: tuple, duration: int) -> None:
+        raise NotImplementedError
+
+    def _finish(self) -> None:
+        raise NotImplementedError
+
+
+class GifWriter(AnimationWriter):
+    """GIF89a with disposal 1 (do not dispose) for every frame.  The colour
+    table of the first frame written becomes the global one; later frames
+    only carry their own table when it differs.  Frames drawn over a base
+    with the same palette get one more, transparent, palette entry for the
+    pixels that stay as they are."""
+
+    name = "gif"
+    suffix = ".gif"
+    max_duration = 0xFFFF * 10  # 16-bit centiseconds
+
+    def _open(self) -> None:
+        # the header holds the global colour table, so it waits for the first frame
+        self._palette: bytes | None = None
+
+    def _write_header(self, palette: bytes, size_bits: int) -> None:
+        assert self._out is not None
+        flags = 0x80 | size_bits if palette else 0
+        self._out.write(b"GIF89a" + struct.pack("<HHBBB", *self.size, flags, 0, 0) + palette)
+        self._out.write(b"!\xff\x0bNETSCAPE2.0\x03\x01" + struct.pack("<H", self.loop) + b"\x00")
+        self._palette = palette
+
+    @classmethod
+    def _over(cls, frame: Image.Image, base: Image.Image) -> Image.Image:
+        """Return *frame* with the pixels that match *base* transparent, if
+        both share a palette with room for a transparent entry."""
+        if frame.mode != "P" or base.mode != "P":
+            return frame
+        palette = frame.getpalette("RGBA")
+        if palette is None or len(palette) >= 4 * 256 or palette != base.getpalette("RGBA"):
+            return frame
+        import numpy as np
+        from PIL import Image
+
+        transparent = len(palette) // 4
+        pixels = np.array(frame)
+        pixels[pixels == np.asarray(base)] = transparent
+        masked = Image.fromarray(pixels)
+        masked.putpalette(palette + [0, 0, 0, 0], "RGBA")
+        masked.info["transparency"] = transparent
+        return masked
+
+    @classmethod
+    def _encode_frame(cls, frame: Image.Image) -> tuple[bytes, tuple]:
+        """Encode *frame* as a single-frame GIF and return its image block
+        with the colour table made local, plus its transparent index."""
+        buffer = io.BytesIO()
+        frame.save(buffer, format="GIF", optimize=False)
+        data = buffer.getvalue()
+
+        flags = data[10]
+        pos = 13
+        palette = b""
+        if flags & 0x80:
+            palette = data[pos : pos + (3 << ((flags & 0x07) + 1))]
+            pos += len(palette)
+
+        transparency: int | None = None
+        while data[pos] == 0x21:
+            if data[pos + 1] == 0xF9 and data[pos + 3] & 0x01:
+                transparency = data[pos + 6]
+            pos += 2
+            while data[pos]:
+                pos += data[pos] + 1
+            pos += 1
+
+        descriptor = bytearray(data[pos : pos + 10])
+        if palette and not descriptor[9] & 0x80:
+            descriptor[9] |= 0x80 | (flags & 0x07)
+        else:
+            palette = b""
+        # everything up to (excluding) the trailer is the LZW data of this frame
+        return bytes(descriptor) + palette + data[pos + 10 : -1], (transparency,)
+
+    def _write_frame(self, block: bytes, meta: tuple, duration: int) -> None:
+        assert self._out is not None
+        box, transparency = meta
+        flags = block[9]
+        palette = block[10 : 10 + (3 << ((flags & 0x07) + 1))] if flags & 0x80 else b""
+        if self._palette is None:
+            self._write_header(palette, flags & 0x07)
+        if palette and palette == self._palette:
+            # drop the local table, the global one is the same
+            block = block[:9] + bytes([flags & ~0x87]) + block[10 + len(palette) :]
+
+        packed = (1 << 2) | (0x01 if transparency is not None else 0x00)
+        self._out.write(
+            b"!\xf9\x04"
+            + struct.pack("<BHB", packed, int(duration / 10), transparency or 0)
+            + b"\x00"
+        )
+        self._out.write(block[:1] + struct.pack("<HH", box[0], box[1]) + block[5:])
+
+    def _finish(self) -> None:
+        assert self._out is not None
+        if self._palette is None:
+            self._write_header(b"", 0)
+        self._out.write(b";")
+
+
+class ApngWriter(AnimationWriter):
+    """Animated PNG: RGBA frames, the first one doubles as the default image.
+    The frame count in ``acTL`` is patched in once all frames are written."""
+
+    name = "apng"
+    suffix = ".apng"
+    max_duration = 0xFFFF * 10  # 16-bit delay_num over delay_den 100
+
+    def _open(self) -> None:
+        assert self._out is not None
+        self._sequence = 0
+        self._out.write(b"\x89PNG\r\n\x1a\n")
+        self._out.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", *self.size, 8, 6, 0, 0, 0)))
+        self._actl = self._out.tell()
+        self._out.write(_png_chunk(b"acTL", struct.pack(">II", 0, self.loop)))
+
+    @classmethod
+    def _encode_frame(cls, frame: Image.Image) -> tuple[bytes, tuple]:
+        """Return the zlib stream (all IDAT data) of *frame* as RGBA PNG."""
+        buffer = io.BytesIO()
+        frame.convert("RGBA").save(buffer, format="PNG")
+        data = buffer.getvalue()
+        pos = 8
+        idat = []
+        while pos < len(data):
+            length, kind = struct.unpack_from(">I4s", data, pos)
+            if kind == b"IDAT":
+                idat.append(data[pos + 8 : pos + 8 + length])
+            pos += length + 12
+        return b"".join(idat), ()
+
+    def _write_frame(self, block: bytes, meta: tuple, duration: int) -> None:
+        assert self._out is not None
+        box, = meta
+        width, height = box[2] - box[0], box[3] - box[1]
+        delay, unit = (duration, 1000) if duration < 1 << 16 else (duration // 10, 100)
+        self._out.write(_png_chunk(b"fcTL", struct.pack(
+            ">IIIIIHHBB", self._sequence, width, height, box[0], box[1], delay, unit, 0, 0
+        )))
+        self._sequence += 1
+        if self.frames_written == 0:
+            # the default image has to cover the whole canvas
+            assert (width, height) == self.size
+            self._out.write(_png_chunk(b"IDAT", block))
+        else:
+            self._out.write(_png_chunk(b"fdAT", struct.pack(">I", self._sequence) + block))
+            self._sequence += 1
+
+    def _finish(self) -> None:
+        assert self._out is not None
+        self._out.write(_png_chunk(b"IEND", b""))
+        self._out.seek(self._actl)
+        self._out.write(_png_chunk(b"acTL", struct.pack(">II", self.frames_written, self.loop)))
+
+
+class WebPWriter(AnimationWriter):
+    """Animated lossless WebP.  Frame offsets are stored halved, so boxes are
+    widened to even left/top edges."""
+
+    name = "webp"
+    suffix = ".webp"
+    max_duration = 0xFFFFFF  # 24-bit milliseconds
+
+    @classmethod
+    def _align(cls, box: tuple[int, int, int, int]) -> tuple[int, int, int, int]:
+        return (box[0] - box[0] % 2, box[1] - box[1] % 2, box[2], box[3])
+
+    def _open(self) -> None:
+        assert self._out is not None
+        width, height = self.size
+        self._out.write(b"RIFF\x00\x00\x00\x00WEBP")
+        # flags: alpha (0x10) and animation (0x02), canvas size minus one
+        vp8x = struct.pack("<I", 0x12) + (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+        self._out.write(_riff_chunk(b"VP8X", vp8x))
+        self._out.write(_riff_chunk(b"ANIM", struct.pack("<4BH", 0, 0, 0, 0, self.loop)))
+
+    @classmethod
+    def _encode_frame(cls, frame: Image.Image) -> tuple[bytes, tuple]:
+        """Return the bitstream chunks (ALPH/VP8/VP8L) of *frame*."""
+        buffer = io.BytesIO()
+        frame.save(buffer, format="WEBP", lossless=True)
+        data = buffer.getvalue()
+        pos = 12
+        chunks = []
+        while pos < len(data):
+            kind, length = struct.unpack_from("<4sI", data, pos)
+            end = pos + 8 + length + (length % 2)
+            if kind in (b"ALPH", b"VP8 ", b"VP8L"):
+                chunks.append(data[pos:end])
+            pos = end
+        return b"".join(chunks), ()
+
+    def _write_frame(self, block: bytes, meta: tuple, duration: int) -> None:
+        assert self._out is not None
+        box, = meta
+        header = b"".join(
+            value.to_bytes(3, "little")
+            for value in (
+                box[0] // 2,
+                box[1] // 2,
+                box[2] - box[0] - 1,
+                box[3] - box[1] - 1,
+                duration,
+            )
+        )
+        # 0x02: do not blend, the frame replaces the pixels it covers
+        self._out.write(_riff_chunk(b"ANMF", header + b"\x02" + block))
+
+    def _finish(self) -> None:
+        assert self._out is not None
+        size = self._out.tell()
+        self._out.seek(4)
+        self._out.write(struct.pack("<I", size - 8))
+
+
+WRITERS: dict[str, type[AnimationWriter]] = {
+    GifWriter.name: GifWriter,
+    ApngWriter.name: ApngWriter,
+    WebPWriter.name: WebPWriter,
+}
+
+
+def get_writer(name: str, path: Path, loop: int = 0) -> AnimationWriter:
+    """Return a writer for format *name* writing to *path* plus its suffix."""
+    try:
+        writer = WRITERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown format {name!r}. Choose from: {sorted(WRITERS)}") from None
+    return writer(path.with_name(path.name + writer.suffix), loop)
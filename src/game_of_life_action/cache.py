@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# SVG render cache
+# ---------------------------------------------------------------------------
+#
+# Rendered PNGs are stored under a hash of the SVG bytes and the renderer's
+# parameters, so an unchanged SVG is rendered once no matter which URL or file
+# name it came from.  Every entry is KEY.png plus KEY.seconds, how long its
+# render took, which a later hit reports as time saved.  Hits touch the entry
+# and once the directory outgrows its limit the least recently used entries are
+# removed first.  The cache is an optimisation only: any OSError is a miss.
+
+
+def default_cache_dir() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "game-of-life-action" / "svg"
+
+
+def render_key(data: bytes, params: str) -> str:
+    """Hash the SVG *data* together with the renderer *params*."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(params.encode())
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def get(self, key: str) -> tuple[bytes, float] | None:
+        """Return the PNG cached for *key* and the seconds its render took, or
+        None if there is no such entry."""
+        entry = self.directory / f"{key}.png"
+        try:
+            png = entry.read_bytes()
+            os.utime(entry)
+            return png, float((self.directory / f"{key}.seconds").read_text())
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, png: bytes, seconds: float) -> None:
+        """Store *png* (rendered in *seconds*) for *key* and evict old entries."""
+        entry = self.directory / f"{key}.png"
+        partial = entry.with_suffix(".part")
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / f"{key}.seconds").write_text(f"{seconds:.3f}")
+            partial.write_bytes(png)
+            os.replace(partial, entry)
+        except OSError:
+            return
+        self._evict()
+
+    def _evict(self) -> None:
+        try:
+            entries = [(entry.stat(), entry) for entry in self.directory.glob("*.png")]
+        except OSError:
+            return
+        entries.sort(key=lambda item: item[0].st_mtime)
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, entry in entries:
+            if total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            entry.with_suffix(".seconds").unlink(missing_ok=True)
+            total -= stat.st_size
@@ -1,24 +1,69 @@
 from __future__ import annotations
 
+import importlib
 import sys
+import time
 from pathlib import Path
 
-from .config import ConfigError, parse_args
-from .engine import GameOfLifeEngine
+_STARTED = time.perf_counter()
+
+from .config import ConfigError, Settings, parse_themes
+
+# cold start of a plain run (imports of everything the chosen mode loads),
+# checked by -profile-startup
+STARTUP_BUDGET_MS = 250.0
+
+
+def _startup_modules(settings: Settings) -> list[str]:
+    """Modules the mode selected by *settings* imports, dependencies first."""
+    modules = ["numpy", "PIL.Image", "PIL.PngImagePlugin"]
+    if settings.engine == "convolve":
+        modules.append("scipy.ndimage")
+    modules.append("game_of_life_action.engine")
+    if settings.advance:
+        modules.append("game_of_life_action.hashlife")
+    if settings.gif or settings.from_transition:
+        modules.append("PIL.GifImagePlugin")
+        if settings.workers != 1:
+            modules.append("game_of_life_action.parallel")
+    return modules
+
+
+def profile_startup(settings: Settings, elapsed: float) -> int:
+    """Import what *settings* needs one module at a time and print how long
+    each took on top of the ones before it.  Fails past STARTUP_BUDGET_MS."""
+    rows = [("cli + config + argument parsing", elapsed)]
+    for module in _startup_modules(settings):
+        started = time.perf_counter()
+        importlib.import_module(module)
+        rows.append((module, time.perf_counter() - started))
+    total = sum(seconds for _, seconds in rows) * 1000
+    for module, seconds in rows:
+        print(f"{seconds * 1000:8.1f} ms  {module}")
+    print(f"{total:8.1f} ms  total (budget {STARTUP_BUDGET_MS:.0f} ms)")
+    if total > STARTUP_BUDGET_MS:
+        print("Startup exceeds the budget")
+        return 1
+    return 0
 
 
 def main(argv: list[str] | None = None) -> int:
     default_path = Path(__file__).resolve().parents[2] / "GameOfLife"
 
     try:
-        settings = parse_args(argv, default_path=default_path)
+        themes = parse_themes(argv, default_path=default_path)
     except ConfigError as exc:
         print(exc)
         return 2
 
+    if themes[0].profile_startup:
+        return profile_startup(themes[0], time.perf_counter() - _STARTED)
+
+    # numpy and PIL are only imported once there is a game to run
+    from .engine import GameOfLifeEngine, run_themes
+
     try:
-        engine = GameOfLifeEngine(settings)
-        engine.run()
+        run_themes([GameOfLifeEngine(settings) for settings in themes])
     except KeyboardInterrupt:
         return 130
     except Exception as exc:
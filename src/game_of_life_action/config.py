@@ -1,17 +1,34 @@
 from __future__ import annotations
 
 import argparse
-import atexit
+import importlib.util
+import re
+import sys
 from dataclasses import dataclass
 from dataclasses import field
 from pathlib import Path
+from typing import TYPE_CHECKING
 from typing import cast
 from typing import Sequence
 
-from PIL.ImageColor import getcolor
+from .animation import WRITERS
+from .cache import RenderCache, default_cache_dir, render_key
+from .tracing import tracelog
 
+if TYPE_CHECKING:
+    from PIL import Image
+
+# names of stepper.STEPPERS, spelled out so that parsing (and -h) does not
+# import numpy; get_stepper still rejects anything else
+_ENGINES = ("convolve", "numpy", "packed", "tiles")
+_COLOR_ARGS = {"-cdead", "-cdying", "-calive"}
+# commas separate themes, except inside functional colours such as rgb(1,2,3)
+_THEME_SPLIT = re.compile(r",(?![^(]*\))")
 _ALLOWED_EXT = {".BMP", ".JPEG", ".PNG", ".SPIDER", ".TIFF", ".GIF"}
 _SVG_EXT = ".SVG"
+# -pattern values that are not pattern files
+_BOARDS = ("random", "soup")
+_PATTERN_EXT = {".rle", ".cells"}
 
 
 @dataclass(slots=True)
@@ -30,6 +47,19 @@ class Settings:
     name: str = field(default="GameOfLife")
     auto_colors: bool = field(default=False)
     grid_explicit: bool = field(default=False)
+    engine: str = field(default="numpy")
+    advance: int = field(default=0)
+    period: int = field(default=30)
+    format: str = field(default="gif")
+    workers: int = field(default=1)
+    seed: int | None = field(default=None)
+    density: float = field(default=0.5)
+    # "random", "soup" or a .rle/.cells pattern file
+    pattern: str | Path = field(default="random")
+    frame_store: bool = field(default=False)
+    profile_startup: bool = field(default=False)
+    # SVG inputs rendered in memory, by the PNG path that stands for them
+    rendered: dict[Path, Image.Image] = field(default_factory=dict)
 
 
 class ConfigError(ValueError):
@@ -37,6 +67,8 @@ class ConfigError(ValueError):
 
 
 def _parse_color(raw: str, name: str) -> tuple[int, int, int, int]:
+    from PIL.ImageColor import getcolor
+
     raw = raw.strip()
     if not raw:
         raise ConfigError(f"Invalid {name}: expected a color value")
@@ -58,10 +90,10 @@ def _parse_int_pair(raw: str, name: str) -> tuple[int, int]:
     return values
 
 
-def _resolve_svg(value: str, dir: Path, name: str) -> Path:
-    """Convert an SVG file path or URL to a PNG in *dir* and return its path.
-    The temp file is registered for deletion on process exit."""
-    from .svg import svg_to_png  # local import to avoid circular deps
+def _resolve_svg(value: str, dir: Path, name: str, jobs: dict[Path, Path | str]) -> Path:
+    """Plan the conversion of an SVG file path or URL and return the PNG path
+    in *dir* that stands for it.  The conversion itself happens in
+    _convert_svgs and nothing is written there."""
     source: Path | str = Path(value).expanduser().resolve()
     if source.exists() and source.is_file():
         stem = source.stem
@@ -69,12 +101,58 @@ def _resolve_svg(value: str, dir: Path, name: str) -> Path:
         source = value
         stem = name
     out = dir / f"{stem}.png"
-    print(f"Converting SVG to PNG: {value}")
-    svg_to_png(source, out)
-    atexit.register(lambda p: p.unlink(missing_ok=True), out)
+    if jobs.get(out, source) != source:
+        out = dir / f"{stem}-{len(jobs)}.png"
+    jobs[out] = source
     return out
 
 
+def _convert_svgs(
+    jobs: dict[Path, Path | str],
+    grid: tuple[int, int] | None,
+    cache_dir: str,
+    cache_mb: int,
+) -> dict[Path, Image.Image]:
+    """Render all planned SVGs in memory, taking unchanged ones from the
+    render cache in *cache_dir* and rendering the rest with render_svgs."""
+    if not jobs:
+        return {}
+    import io
+
+    from PIL import Image
+
+    from .svg import read_svg, render_params, render_svgs  # local import to avoid circular deps
+    cache = RenderCache(Path(cache_dir).expanduser(), cache_mb * 2**20) if cache_dir else None
+    images: dict[Path, Image.Image] = {}
+    misses: list[tuple[Path | str, Path, str | None]] = []
+    contents: list[bytes | None] = []
+    for out, source in jobs.items():
+        key = data = None
+        if cache is not None:
+            try:
+                data = read_svg(source)
+                key = render_key(data, render_params(data, grid))
+            except OSError as exc:
+                tracelog("svg cache: could not read", source, "-", exc)
+        hit = cache.get(key) if cache is not None and key else None
+        if hit is not None:
+            tracelog(f"svg cache hit: {source} (saved {hit[1]:.2f}s)")
+            images[out] = Image.open(io.BytesIO(hit[0])).convert("RGBA")
+            continue
+        print(f"Converting SVG: {source}")
+        misses.append((source, out, key))
+        contents.append(data)
+    rendered = render_svgs([source for source, _, _ in misses], contents, grid)
+    for (source, out, key), (_, render_seconds, image) in zip(misses, rendered):
+        images[out] = image
+        if cache is not None and key:
+            tracelog(f"svg cache miss: {source} (rendered in {render_seconds:.2f}s)")
+            png = io.BytesIO()
+            image.save(png, format="PNG")
+            cache.put(key, png.getvalue(), render_seconds)
+    return images
+
+
 def _validate_image_file(path: Path, field_name: str) -> Path:
     if not path.exists() or not path.is_file():
         raise ConfigError(f"Invalid {field_name}: file does not exist")
@@ -85,7 +163,68 @@ def _validate_image_file(path: Path, field_name: str) -> Path:
     return path
 
 
+def split_theme_argv(argv: Sequence[str]) -> tuple[list[str], list[str], bool]:
+    """Split argv where color args accept '#light,#dark' into two
+    single-color argvs understood by parse_args.  The flag tells whether any
+    color actually had a dark variant."""
+    light_argv: list[str] = []
+    dark_argv: list[str] = []
+    paired = False
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg in _COLOR_ARGS and i + 1 < len(argv):
+            parts = [p.strip() for p in _THEME_SPLIT.split(argv[i + 1]) if p.strip()] or [""]
+            light_argv += [arg, parts[0]]
+            dark_argv  += [arg, parts[1] if len(parts) > 1 else parts[0]]
+            paired = paired or len(parts) > 1
+            i += 2
+        else:
+            light_argv.append(arg)
+            dark_argv.append(arg)
+            i += 1
+    return light_argv, dark_argv, paired
+
+
+def parse_themes(
+    argv: Sequence[str] | None = None, *, default_path: Path, both_themes: bool = False
+) -> list[Settings]:
+    """Like parse_args, but -cdead/-cdying/-calive may be '#light,#dark'
+    pairs.  With a pair (or *both_themes*, the layout of the legacy
+    GameOfLife.py) the result holds a light and a dark theme named NAMELight
+    and NAMEDark, otherwise just the single theme.  SVG inputs are rendered
+    once for all themes."""
+    light_argv, dark_argv, paired = split_theme_argv(sys.argv[1:] if argv is None else argv)
+    svg_jobs: dict[Path, Path | str] = {}
+    light, svg_options = _parse_args(light_argv, default_path, svg_jobs)
+    themes = [light]
+    if light.gif or light.from_transition:
+        # the animation is named after its input, so themes would overwrite each other
+        if paired:
+            raise ConfigError("Invalid colors: #light,#dark pairs cannot be combined with -gif or -from/-to")
+    elif paired or both_themes:
+        dark, _ = _parse_args(dark_argv, default_path, svg_jobs)
+        light.name += "Light"
+        dark.name += "Dark"
+        themes.append(dark)
+    rendered = _convert_svgs(svg_jobs, *svg_options)
+    for settings in themes:
+        settings.rendered = rendered
+    return themes
+
+
 def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Settings:
+    svg_jobs: dict[Path, Path | str] = {}
+    settings, svg_options = _parse_args(argv, default_path, svg_jobs)
+    settings.rendered = _convert_svgs(svg_jobs, *svg_options)
+    return settings
+
+
+def _parse_args(
+    argv: Sequence[str] | None, default_path: Path, svg_jobs: dict[Path, Path | str]
+) -> tuple[Settings, tuple[tuple[int, int] | None, str, int]]:
+    """Parse *argv* into Settings without rendering SVG inputs: those are
+    planned in *svg_jobs* and returned with the arguments for _convert_svgs."""
     parser = argparse.ArgumentParser(description="Generate and evolve a Game of Life image")
 
     parser.add_argument("-p", "-path", default=str(default_path), dest="path")
@@ -100,12 +239,30 @@ def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Sett
     parser.add_argument("-gifSpeed", default=100, type=int)
     parser.add_argument("-from", default="", dest="from_transition")
     parser.add_argument("-to", default="", dest="to_transition")
+    parser.add_argument("-engine", default="numpy", choices=sorted(_ENGINES))
+    parser.add_argument("-advance", default=0, type=int)
+    parser.add_argument("-period", default=30, type=int)
+    parser.add_argument("-format", default="gif", choices=sorted(WRITERS))
+    parser.add_argument("-workers", default=1, type=int)
+    parser.add_argument("-seed", default=None, type=int)
+    parser.add_argument("-density", default=0.5, type=float)
+    parser.add_argument("-pattern", default="random")
+    parser.add_argument("-frameStore", action="store_true", dest="frame_store")
+    parser.add_argument("-svgCache", default=str(default_cache_dir()))
+    parser.add_argument("-svgCacheSize", default=64, type=int)
+    parser.add_argument("-profile-startup", action="store_true", dest="profile_startup")
 
     param = parser.parse_args(argv)
 
     path = Path(param.path).expanduser().resolve()
+    pattern: str | Path = param.pattern
+    if path.is_file() and path.suffix.lower() in _PATTERN_EXT:
+        # a pattern file as PATH starts the game in its folder from it
+        if pattern != "random":
+            raise ConfigError("Invalid -pattern: PATH already is a pattern file")
+        path, pattern = path.parent, path
     if not path.exists() or not path.is_dir():
-        raise ConfigError("Invalid PATH: choose an existing folder")
+        raise ConfigError("Invalid PATH: choose an existing folder or a .rle/.cells pattern file")
 
     auto_colors = param.cdead is None and param.cdying is None and param.calive is None
     cdead  = _parse_color(param.cdead,  "-cdead")  if param.cdead  else (255, 254, 254, 255)
@@ -119,7 +276,11 @@ def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Sett
     gif: Path | None = None
     if gif_raw:
         if gif_raw.upper().endswith(_SVG_EXT) or gif_raw.startswith(("http://", "https://")):
-            gif = _resolve_svg(gif_raw, path, param.name)
+            gif = _resolve_svg(gif_raw, path, param.name, svg_jobs)
+        elif gif_raw.lower().endswith(tuple(_PATTERN_EXT)):
+            gif = Path(gif_raw).expanduser().resolve()
+            if not gif.is_file():
+                raise ConfigError("Invalid -gif: file does not exist")
         else:
             gif = _validate_image_file(Path(gif_raw).expanduser().resolve(), "-gif")
 
@@ -127,7 +288,7 @@ def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Sett
     from_transition: Path | None = None
     if from_raw:
         if from_raw.upper().endswith(_SVG_EXT) or from_raw.startswith(("http://", "https://")):
-            from_transition = _resolve_svg(from_raw, path, param.name)
+            from_transition = _resolve_svg(from_raw, path, param.name, svg_jobs)
         else:
             from_transition = Path(from_raw).expanduser().resolve()
 
@@ -135,23 +296,51 @@ def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Sett
     to_transition: Path | None = None
     if to_raw:
         if to_raw.upper().endswith(_SVG_EXT) or to_raw.startswith(("http://", "https://")):
-            to_transition = _resolve_svg(to_raw, path, param.name)
+            to_transition = _resolve_svg(to_raw, path, param.name, svg_jobs)
         else:
             to_transition = Path(to_raw).expanduser().resolve()
 
+    if param.svgCacheSize < 0:
+        raise ConfigError("Invalid -svgCacheSize: expected a non-negative size in MB")
+
+    if param.advance < 0:
+        raise ConfigError("Invalid -advance: expected a non-negative number of generations")
+
+    if param.engine == "convolve" and importlib.util.find_spec("scipy") is None:
+        raise ConfigError("Invalid -engine: convolve requires SciPy (pip install scipy)")
+
+    if param.workers < 0:
+        raise ConfigError("Invalid -workers: expected a non-negative number of processes")
+
+    if param.period < 1:
+        raise ConfigError("Invalid -period: expected a positive cycle length")
+
+    if param.seed is not None and param.seed < 0:
+        raise ConfigError("Invalid -seed: expected a non-negative integer")
+
+    if not 0 < param.density <= 1:
+        raise ConfigError("Invalid -density: expected a fraction of alive cells in (0, 1]")
+
+    if isinstance(pattern, str) and pattern not in _BOARDS:
+        pattern = Path(param.pattern).expanduser().resolve()
+        if not pattern.is_file() or pattern.suffix.lower() not in _PATTERN_EXT:
+            raise ConfigError(f"Invalid -pattern: expected {', '.join(_BOARDS)} or an existing .rle/.cells file")
+
     if bool(from_transition) != bool(to_transition):
         raise ConfigError("Transition requires both -from and -to")
 
     if from_transition and to_transition:
-        from_transition = _validate_image_file(from_transition, "-from")
-        to_transition = _validate_image_file(to_transition, "-to")
+        if from_transition not in svg_jobs:
+            from_transition = _validate_image_file(from_transition, "-from")
+        if to_transition not in svg_jobs:
+            to_transition = _validate_image_file(to_transition, "-to")
 
-    if not auto_colors and (gif or (from_transition and to_transition)):
+    if not auto_colors and param.format == "gif" and (gif or (from_transition and to_transition)):
         for palette in (cdead, cdying, calive):
             if palette[3] != 255:
                 raise ConfigError("GIF/transition generation requires alpha FF")
 
-    return Settings(
+    settings = Settings(
         path=path,
         cdead=cdead,
         cdying=cdying,
@@ -166,4 +355,15 @@ def parse_args(argv: Sequence[str] | None = None, *, default_path: Path) -> Sett
         name=param.name,
         auto_colors=auto_colors,
         grid_explicit=grid_explicit,
+        engine=param.engine,
+        advance=param.advance,
+        period=param.period,
+        format=param.format,
+        workers=param.workers,
+        seed=param.seed,
+        density=param.density,
+        pattern=pattern,
+        frame_store=param.frame_store,
+        profile_startup=param.profile_startup,
     )
+    return settings, (grid if grid_explicit else None, param.svgCache, param.svgCacheSize)
@@ -1,26 +1,41 @@
 from __future__ import annotations
 
+import io
+import os
+import secrets
 from pathlib import Path
+from typing import Iterator, Sequence
 
 import numpy as np
 from PIL import Image
-from scipy.ndimage import convolve
 
 from .config import Settings
+from .animation import AnimationWriter, EncodedFrame, get_writer
+from .history import board_hash, cycle_period, load_history, save_history
 from .iteration import update_iteration
+from .overlay import Overlay, pack_colors, pack_rgba
+from .patterns import PATTERN_SUFFIXES, new_board, place, read_pattern, write_cells, write_rle
+from .state import BoardState, png_digest, read_state, write_state
+from .store import FrameStore
+from .stepper import get_stepper
+from .tracing import tracelog, tracelog_peak_memory
 
 _FALLBACK_CDEAD:  tuple[int, int, int, int] = (255, 254, 254, 255)
 _FALLBACK_CDYING: tuple[int, int, int, int] = (40,  57,  74,  255)
 _FALLBACK_CALIVE: tuple[int, int, int, int] = (65,  183, 130, 255)
 
+# auto colours are counted on at most this many pixels, evenly strided
+_COLOR_SAMPLE = 1 << 22
 
-def tracelog(
-    *args: object,
-    sep: str | None = " ",
-    end: str | None = "\n",
-    flush: bool = False,
-) -> None:
-    print("TraceLog:", *args, sep=sep, end=end, flush=flush)
+# chance that a cell shown flipped in one transition frame stayed flipped in
+# the next, before flip times were drawn up front
+_TRANSITION_STICKY = 0.75
+
+# generations rendered to frames at once (one uint8 canvas each)
+_RENDER_FRAMES = 16
+
+# generations stepped into the frame store between two commits
+_STORE_FRAMES = 64
 
 
 class GameOfLifeEngine:
@@ -32,9 +47,14 @@ class GameOfLifeEngine:
 
         self.target_image = self.settings.path / f"{self.settings.name}.png"
         self.target_iteration_image = self.settings.path / f"{self.settings.name}_Iteration.svg"
+        self.target_history = self.settings.path / f"{self.settings.name}.history"
+        self.target_state = self.settings.path / f"{self.settings.name}.state"
+        self.target_pattern = self.settings.path / f"{self.settings.name}.rle"
+        self.target_cells = self.settings.path / f"{self.settings.name}.cells"
 
-        self.kernel = np.ones((3, 3), dtype=np.uint8)
-        self.kernel[1, 1] = 0
+        self.stepper = get_stepper(settings.engine)
+        self._pixel_maps_key: tuple | None = None
+        self._pixel_maps_cache: tuple[np.ndarray, np.ndarray] = (np.empty(0), np.empty(0))
 
     def run(self) -> None:
         if self.settings.gif:
@@ -45,88 +65,214 @@ class GameOfLifeEngine:
             self.create_transition(self.settings.from_transition, self.settings.to_transition)
             return
 
+        self.check_pattern()
+        if self.settings.advance and self.target_image.exists():
+            self.advance_game(self.target_image, self.settings.advance)
+            return
+
         if self.target_image.exists():
             try:
                 tracelog("reading game state...")
-                cells, _, overlay_mask, source_pixels = self.init_running_game(self.target_image)
-                prev_image = self.generate_image(cells)
+                game = self.load_game(self.target_image)
                 tracelog("updating game cycle...")
-                cells = next(self.update_game(cells))
-                tracelog("generating new image...")
-                image = self.generate_image(cells)
-
-                if np.array_equal(np.asarray(prev_image), np.asarray(image)):
-                    tracelog("game finished, only still-lifes or no lifes")
-                    tracelog("starting over...")
-                    self.start_new_game(self.target_image)
-                    tracelog("resetting index counter...")
-                    update_iteration(self.target_iteration_image, self.settings.calive, False)
-                else:
-                    image = self._apply_overlay(image, overlay_mask, source_pixels)
-                    tracelog("saving image...")
-                    image.save(self.target_image)
-                    tracelog("updating index counter...")
-                    update_iteration(self.target_iteration_image, self.settings.calive, True)
+                self.save_generation(game, next(self.iterate_game(game[0])))
             except Exception as exc:
-                tracelog("an error occured:", exc)
-                tracelog("restarting...")
-                self.start_new_game(self.target_image)
-                tracelog("resetting index counter...")
-                update_iteration(self.target_iteration_image, self.settings.calive, False)
+                self.restart_game(exc)
         else:
             tracelog("starting new game...")
             self.start_new_game(self.target_image)
             tracelog("generating index counter...")
             update_iteration(self.target_iteration_image, self.settings.calive, False)
 
+    def save_generation(
+        self,
+        game: tuple[np.ndarray, Overlay | None],
+        cells: np.ndarray,
+    ) -> None:
+        """Save *cells*, the generation following the loaded *game*, or start
+        over if it closes a cycle."""
+        previous, overlay = game
+        history = load_history(self.target_history, board_hash(previous))
+        digest = board_hash(cells)
+        period = cycle_period(history, digest)
+
+        if period:
+            tracelog("game finished, cycle with period", period)
+            tracelog("starting over...")
+            self.start_new_game(self.target_image)
+            tracelog("resetting index counter...")
+            update_iteration(self.target_iteration_image, self.settings.calive, False)
+            return
+
+        tracelog("generating new image...")
+        image = self.generate_image(cells, overlay=overlay)
+        tracelog("saving image...")
+        image_digest = self.save_image(image, self.target_image)
+        save_history(self.target_history, [*history, digest], self.settings.period)
+        tracelog("updating index counter...")
+        generation = update_iteration(self.target_iteration_image, self.settings.calive, True)
+        self.save_state(cells, image_digest, generation, overlay)
+
+    def restart_game(self, exc: Exception) -> None:
+        tracelog("an error occured:", exc)
+        tracelog("restarting...")
+        self.start_new_game(self.target_image)
+        tracelog("resetting index counter...")
+        update_iteration(self.target_iteration_image, self.settings.calive, False)
+
     def _define_cell_size(self) -> tuple[int, int]:
         cell_h = int(np.ceil(self.canvas_size[0] / self.cell_grid[0]))
         cell_w = int(np.ceil(self.canvas_size[1] / self.cell_grid[1]))
         return (cell_h, cell_w)
 
     def update_game(self, cells: np.ndarray):
+        stepper = self.stepper
         while True:
-            num_alive = convolve(cells, self.kernel, mode="constant")
-            cells = (((cells) & (num_alive == 2)) | (num_alive == 3)).astype(np.uint8)
-
-            num_alive = convolve(cells, self.kernel, mode="constant")
-            cells[(cells == 1) & ((num_alive < 2) | (num_alive > 3))] = 2
+            cells = stepper.step(cells)
+            cells[stepper.dying(cells, stepper.count(cells))] = 2
 
             yield cells
             cells[cells > 1] = 1
 
-    def generate_image(self, cells: np.ndarray) -> Image.Image:
-        color_dead = self.settings.cdead
-        color_alive = self.settings.calive
-        color_dying = self.settings.cdying
+    def iterate_game(self, cells: np.ndarray) -> Iterator[np.ndarray]:
+        """Yield the following generations of *cells* (dying cells marked 2).
+
+        Unlike ``update_game`` every generation is a fresh read-only array
+        that is never touched again, and the neighbour counts of each
+        generation are reused for its dying mask and its successor."""
+        alive = (cells > 0).astype(np.uint8)
+        for alive, dying in self.stepper.run(alive):
+            frame = alive + dying
+            frame.flags.writeable = False
+            yield frame
+
+    def simulate(self, cells: np.ndarray, n: int, out: np.ndarray | None = None) -> np.ndarray:
+        """Return the *n* generations after *cells* (dying cells marked 2),
+        stacked as (n, rows, cols) uint8 in *out* or a new array."""
+        if out is None:
+            out = np.empty((n, *cells.shape), dtype=np.uint8)
+        generations = self.stepper.run((cells > 0).astype(np.uint8))
+        for frame, (alive, dying) in zip(out[:n], generations):
+            np.add(alive, dying, out=frame)
+        return out
+
+    def simulate_stored(self, cells: np.ndarray, n: int, store_file: Path) -> np.ndarray:
+        """``simulate`` into the frame store *store_file*, continuing after
+        the generations it already holds for *cells*.  The returned stack is
+        memory-mapped; without a usable store it is simulated in memory."""
+        if n == 0:
+            return self.simulate(cells, n)
+        try:
+            store = FrameStore(store_file, cells, n)
+        except OSError as exc:
+            tracelog("frame store unavailable:", exc)
+            return self.simulate(cells, n)
+        with store:
+            done = min(store.written, n)
+            if done:
+                tracelog("reusing", done, "/", n, "generations from", store_file)
+            while done < n:
+                chunk = min(_STORE_FRAMES, n - done)
+                start = store.cells[done - 1] if done else cells
+                self.simulate(start, chunk, store.cells[done : done + chunk])
+                done += chunk
+                store.commit(done)
+                tracelog("stored generation", done, "/", n)
+        return store.cells[:n]
+
+    def generate_image(
+        self, cells: np.ndarray, indexed: bool = False, overlay: Overlay | None = None
+    ) -> Image.Image:
+        """Render *cells* at canvas size, with *overlay* on top.
+
+        The cell values (0 dead, 1 alive, 2 dying) index a three colour
+        palette, which is applied at cell resolution before a single upsample.
+        With *indexed* a ``P`` image is returned so GIF frames are saved
+        without re-quantising (unless the overlay has too many colours for
+        one palette); otherwise the RGBA pixels used for PNG output, looked up
+        as packed uint32 colours.  The overlay is written into the rendered
+        pixels in place."""
+        if indexed and (not overlay or overlay.indices is not None):
+            return self.render_stack(np.asarray(cells)[np.newaxis], overlay)[0]
+        palette = (self.settings.cdead, self.settings.calive, self.settings.cdying)
+        rows, cols = self._pixel_maps()
+        pixels = pack_colors(palette).take(cells).take(cols, axis=1).take(rows, axis=0)
+        if overlay:
+            overlay.paint(pixels)
+        return Image.fromarray(pixels.view(np.uint8).reshape(*pixels.shape, 4))
+
+    def render_stack(self, stack: np.ndarray, overlay: Overlay | None = None) -> list[Image.Image]:
+        """Render the (n, rows, cols) generations in *stack* like
+        ``generate_image(indexed=True)``, with one upsample for all of them.
+
+        Columns are gathered at cell resolution first, so the pixel rows of
+        a cell row are plain copies of each other."""
+        indices = overlay.indices if overlay else None
+        if overlay and indices is None:
+            return [self.generate_image(cells, False, overlay) for cells in stack]
+        rows, cols = self._pixel_maps()
+        frames = np.asarray(stack, dtype=np.uint8).take(cols, axis=2).take(rows, axis=1)
+        if overlay and indices is not None:
+            frames.reshape(len(frames), -1)[:, overlay.positions] = indices
+        palette = self._frame_colors(overlay).tobytes()
+        images = []
+        for frame in frames:
+            image = Image.fromarray(frame)
+            image.putpalette(palette, "RGBA")
+            images.append(image)
+        return images
 
-        array = np.zeros([*cells.shape, 4], dtype=np.uint8)
-        array[cells == 0] = color_dead
-        array[cells == 1] = color_alive
-        array[cells == 2] = color_dying
-        array = array.repeat(self.cell_size[0], axis=0).repeat(self.cell_size[1], axis=1)
-        array = array[: self.canvas_size[0], : self.canvas_size[1]]
-        return Image.fromarray(array)
+    def _frame_colors(self, overlay: Overlay | None) -> np.ndarray:
+        """Return the packed palette of indexed frames: the game colours,
+        then the overlay colours."""
+        colors = pack_colors((self.settings.cdead, self.settings.calive, self.settings.cdying))
+        return np.concatenate((colors, overlay.palette)) if overlay else colors
+
+    def index_image(self, image: Image.Image, overlay: Overlay | None) -> Image.Image:
+        """Return *image* with the palette ``render_stack`` gives generated
+        frames, so an animation can share one colour table, or *image*
+        itself if it has other colours."""
+        if overlay and overlay.indices is None:
+            return image
+        keys = pack_rgba(np.asarray(image.convert("RGBA")))
+        colors = self._frame_colors(overlay)
+        order = np.argsort(colors, kind="stable")
+        slots = np.searchsorted(colors[order], keys).clip(max=len(colors) - 1)
+        if not (colors[order][slots] == keys).all():
+            return image
+        indexed = Image.fromarray(order[slots].astype(np.uint8))
+        indexed.putpalette(colors.tobytes(), "RGBA")
+        return indexed
+
+    def _pixel_maps(self) -> tuple[np.ndarray, np.ndarray]:
+        """Return the cell row/column of every canvas pixel row/column."""
+        key = (self.canvas_size, self.cell_size)
+        if self._pixel_maps_key != key:
+            self._pixel_maps_cache = (
+                np.arange(self.canvas_size[0]) // self.cell_size[0],
+                np.arange(self.canvas_size[1]) // self.cell_size[1],
+            )
+            self._pixel_maps_key = key
+        return self._pixel_maps_cache
 
     def _resolve_colors(self, pixel_array: np.ndarray | None) -> None:
         """When auto_colors is True, detect the 3 most frequent RGBA values in
         *pixel_array* (at cell resolution) and assign them as cdead (most
-        common), calive (second), cdying (third).  Falls back to hardcoded
-        defaults when no pixel data is available."""
+        common), calive (second), cdying (third); equally frequent colours
+        go in ascending RGBA order.  Falls back to hardcoded defaults when no
+        pixel data is available."""
         if not self.settings.auto_colors:
             return
+        top: list[tuple[int, int, int, int]] = []
         if pixel_array is not None:
-            sampled = pixel_array[:: self.cell_size[0], :: self.cell_size[1]]
-            flat = sampled.reshape(-1, 4)
-            unique_colors, counts = np.unique(flat, axis=0, return_counts=True)
-            order = np.argsort(counts)[::-1]
-            top: list[tuple[int, int, int, int]] = [
-                (int(unique_colors[i, 0]), int(unique_colors[i, 1]),
-                 int(unique_colors[i, 2]), int(unique_colors[i, 3]))
-                for i in order[:3]
-            ]
-        else:
-            top = []
+            sampled = np.ascontiguousarray(pixel_array[:: self.cell_size[0], :: self.cell_size[1]])
+            # big-endian keys sort like the RGBA tuples they pack
+            keys = sampled.view(">u4").ravel()
+            if keys.size > _COLOR_SAMPLE:
+                keys = keys[:: -(-keys.size // _COLOR_SAMPLE)]
+            colors, counts = np.unique(keys, return_counts=True)
+            order = np.argsort(-counts, kind="stable")[:3]
+            top = [tuple(int(key).to_bytes(4, "big")) for key in colors[order]]  # type: ignore[misc]
         fallbacks = [_FALLBACK_CDEAD, _FALLBACK_CALIVE, _FALLBACK_CDYING]
         while len(top) < 3:
             top.append(fallbacks[len(top)])
@@ -135,46 +281,19 @@ class GameOfLifeEngine:
         self.settings.cdying = top[2]
         tracelog("Resolved colors:", "cdead =", self.settings.cdead, ", calive =", self.settings.calive, ", cdying =", self.settings.cdying)
 
-    def _extract_overlay(self, pixel_array: np.ndarray) -> np.ndarray:
-        """Return a boolean mask (H, W) that is True for every pixel whose
-        colour is not exactly one of cdead / calive / cdying.  Those pixels
-        are considered foreign overlay content and must be preserved across
-        game cycles."""
-        cdead  = np.array(self.settings.cdead,  dtype=np.uint8)
-        calive = np.array(self.settings.calive, dtype=np.uint8)
-        cdying = np.array(self.settings.cdying, dtype=np.uint8)
-        is_known = (
-            np.all(pixel_array == cdead,  axis=-1) |
-            np.all(pixel_array == calive, axis=-1) |
-            np.all(pixel_array == cdying, axis=-1)
-        )
-        return ~is_known  # type: ignore[return-value]
-
-    def _apply_overlay(
-        self,
-        image: Image.Image,
-        overlay_mask: np.ndarray,
-        source_pixels: np.ndarray,
-    ) -> Image.Image:
-        """Composite the overlay pixels from *source_pixels* on top of *image*
-        at every position where *overlay_mask* is True."""
-        arr = np.array(image)
-        arr[overlay_mask] = source_pixels[overlay_mask]
-        return Image.fromarray(arr)
-
     def init_convert_game(
         self, image: Image.Image
-    ) -> tuple[np.ndarray, Image.Image, np.ndarray, np.ndarray]:
+    ) -> tuple[np.ndarray, Image.Image, Overlay]:
         """Convert a PIL image into a cell-grid array.
 
         Returns
         -------
-        cells         : (rows, cols) uint8 game array
-        image         : the original PIL image (unchanged)
-        overlay_mask  : (H, W) bool — True where the pixel is foreign overlay
-        source_pixels : (H, W, 4) uint8 — original pixel data for compositing
+        cells   : (rows, cols) uint8 game array
+        image   : the original PIL image (unchanged)
+        overlay : the pixels that are none of cdead / calive / cdying, which
+                  are preserved across game cycles
         """
-        source_pixels = np.asarray(image).copy()
+        source_pixels = np.asarray(image)
         if source_pixels.shape != (*self.canvas_size, 4):
             self.canvas_size = (source_pixels.shape[0], source_pixels.shape[1])
             if not self.settings.grid_explicit:
@@ -183,38 +302,164 @@ class GameOfLifeEngine:
             tracelog("Modified canvas_size:", self.canvas_size)
 
         self._resolve_colors(source_pixels)
-        overlay_mask = self._extract_overlay(source_pixels)
-
-        # Replace overlay pixels with cdead so game logic sees them as dead cells
-        game_pixels = source_pixels.copy()
-        game_pixels[overlay_mask] = self.settings.cdead
+        palette = (self.settings.cdead, self.settings.calive, self.settings.cdying)
+        keys = pack_rgba(source_pixels)
+        overlay = Overlay.extract(keys, palette)
 
-        downsampled = game_pixels[:: self.cell_size[0], :: self.cell_size[1]]
-        current_array = (downsampled != self.settings.cdead).any(-1).astype(np.uint8)
-        return current_array, image, overlay_mask, source_pixels
+        # overlay pixels count as dead cells, so only the two live colours are alive
+        _, alive, dying = pack_colors(palette)
+        downsampled = keys[:: self.cell_size[0], :: self.cell_size[1]]
+        current_array = ((downsampled == alive) | (downsampled == dying)).astype(np.uint8)
+        return current_array, image, overlay
 
     def init_running_game(
         self, image_file: Path
-    ) -> tuple[np.ndarray, Image.Image, np.ndarray, np.ndarray]:
-        image = Image.open(image_file).convert("RGBA")
+    ) -> tuple[np.ndarray, Image.Image, Overlay]:
+        image = self.settings.rendered.get(image_file)
+        if image is None:
+            image = Image.open(image_file).convert("RGBA")
         return self.init_convert_game(image)
 
+    def init_stored_game(self, image_file: Path) -> np.ndarray | None:
+        """Return the cells from the state sidecar of *image_file* without
+        decoding the image, or None if the sidecar is missing or stale."""
+        state = read_state(self.target_state)
+        if state is None:
+            return None
+        try:
+            digest = png_digest(image_file.read_bytes())
+        except OSError:
+            return None
+        if digest != state.digest:
+            tracelog("state file is stale, decoding image...")
+            return None
+        colors = (self.settings.cdead, self.settings.calive, self.settings.cdying)
+        if not self.settings.auto_colors and state.palette != colors:
+            return None
+        if self.settings.grid_explicit:
+            expected = tuple(-(-size // grid) for size, grid in zip(state.canvas, self.settings.grid))
+            if expected != state.cell_size:
+                return None
+
+        if state.canvas != self.canvas_size:
+            self.canvas_size = state.canvas
+            if not self.settings.grid_explicit:
+                self.cell_grid = state.canvas
+            tracelog("Modified canvas_size:", self.canvas_size)
+        self.cell_size = state.cell_size
+        if self.settings.auto_colors:
+            self.settings.cdead, self.settings.calive, self.settings.cdying = state.palette
+            tracelog("Resolved colors:", "cdead =", self.settings.cdead, ", calive =", self.settings.calive, ", cdying =", self.settings.cdying)
+        return state.cells
+
+    def load_game(self, image_file: Path) -> tuple[np.ndarray, Overlay | None]:
+        """Return ``(cells, overlay)`` for *image_file*, from the state
+        sidecar when it is valid (no overlay) and from the image pixels
+        otherwise."""
+        cells = self.init_stored_game(image_file)
+        if cells is not None:
+            return cells, None
+        cells, _, overlay = self.init_running_game(image_file)
+        return cells, overlay
+
+    def init_pattern_game(self, pattern_file: Path) -> np.ndarray:
+        """Return the cells of the ``.rle``/``.cells`` *pattern_file*: the
+        whole board, with the grid (and the canvas, if it has fewer pixels
+        than cells) taken from it, or centred in an explicit -grid."""
+        cells = read_pattern(pattern_file)
+        if self.settings.grid_explicit:
+            return place(cells, self.cell_grid)
+        self.cell_grid = cells.shape
+        self.canvas_size = (max(self.canvas_size[0], cells.shape[0]), max(self.canvas_size[1], cells.shape[1]))
+        self.cell_size = self._define_cell_size()
+        tracelog("Pattern grid:", self.cell_grid, "canvas:", self.canvas_size)
+        return cells
+
+    def check_pattern(self) -> None:
+        """Say so when a -pattern file is not used because the image
+        already holds a game: a pattern only starts new games."""
+        if isinstance(self.settings.pattern, Path) and self.target_image.exists():
+            print(
+                f"Pattern {self.settings.pattern.name} only starts new games: {self.target_image.name}"
+                " already holds one, delete it to start over from the pattern"
+            )
+
     def init_new_game(self) -> np.ndarray:
-        return np.random.default_rng().integers(0, 2, self.cell_grid, dtype=np.uint8)
+        if isinstance(self.settings.pattern, Path):
+            return self.init_pattern_game(self.settings.pattern)
+        seed = self.settings.seed
+        if seed is None:
+            seed = secrets.randbits(128)  # same entropy source SeedSequence() draws from
+        tracelog("new board from -seed", seed)
+        return new_board(self.cell_grid, seed, self.settings.density, str(self.settings.pattern))
 
     def start_new_game(self, target_image: Path) -> None:
-        image = self.generate_image(self.init_new_game())
-        image.save(target_image)
+        cells = self.init_new_game()
+        image = self.generate_image(cells)
+        image_digest = self.save_image(image, target_image)
+        save_history(self.target_history, [board_hash(cells)], self.settings.period)
+        self.save_state(cells, image_digest, 0)
+
+    def save_image(self, image: Image.Image, image_file: Path) -> bytes:
+        """Save *image* as PNG and return the digest of the written bytes."""
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        data = buffer.getvalue()
+        image_file.write_bytes(data)
+        return png_digest(data)
+
+    def save_state(
+        self,
+        cells: np.ndarray,
+        image_digest: bytes,
+        generation: int | None,
+        overlay: Overlay | None = None,
+    ) -> None:
+        """Write the state sidecar for the image just saved and export its
+        board as ``NAME.rle`` and ``NAME.cells``.  Images with overlay pixels have to be decoded
+        on every run, so their sidecar is removed instead."""
+        self.save_pattern(cells, generation)
+        if overlay:
+            self.target_state.unlink(missing_ok=True)
+            return
+        write_state(self.target_state, BoardState(
+            cells=cells,
+            canvas=self.canvas_size,
+            cell_size=self.cell_size,
+            palette=(self.settings.cdead, self.settings.calive, self.settings.cdying),
+            generation=generation or 0,
+            digest=image_digest,
+        ))
+
+    def save_pattern(self, cells: np.ndarray, generation: int | None) -> None:
+        comments = [f"{self.settings.name} generation {generation or 0}"]
+        try:
+            self.target_pattern.write_text(write_rle(cells, comments))
+            self.target_cells.write_text(write_cells(cells, comments))
+        except OSError:
+            return
+
+    def advance_game(self, image_file: Path, generations: int) -> None:
+        """Jump the game in *image_file* forward by *generations* using
+        HashLife and save the result in place."""
+        tracelog("reading game state...")
+        cells, overlay = self.load_game(image_file)
+        from .hashlife import HashLife  # only -advance needs it
+
+        tracelog("advancing", generations, "generations...")
+        alive = HashLife().advance(cells, generations)
+        cells = alive + self.stepper.dying(alive, self.stepper.count(alive))
+        image = self.generate_image(cells, overlay=overlay)
+        tracelog("saving image...")
+        image_digest = self.save_image(image, image_file)
+        save_history(self.target_history, [board_hash(alive)], self.settings.period)
+        tracelog("updating index counter...")
+        generation = update_iteration(self.target_iteration_image, self.settings.calive, True, generations)
+        self.save_state(alive, image_digest, generation, overlay)
 
     def read_gif(self, filename: Path, as_numpy: bool = True, split: bool = True) -> list:
-        gif_image = Image.open(filename)
         images = []
-        total_frames = int(getattr(gif_image, "n_frames", 1))
-        n_frames = (total_frames // 2) + 1 if split else total_frames
-
-        for frame in range(n_frames):
-            gif_image.seek(frame)
-            image = gif_image.convert("RGBA")
+        for image in self.iter_gif(filename, split):
             if as_numpy:
                 image = np.asarray(image)
                 if len(image.shape) == 0:
@@ -222,127 +467,288 @@ class GameOfLifeEngine:
             images.append(image)
         return images
 
+    def count_gif_frames(self, filename: Path, split: bool = True) -> int:
+        with Image.open(filename) as gif_image:
+            total_frames = int(getattr(gif_image, "n_frames", 1))
+        return (total_frames // 2) + 1 if split else total_frames
+
+    def iter_gif(self, filename: Path, split: bool = True, start: int = 0) -> Iterator[Image.Image]:
+        """Yield the RGBA frames of *filename* one at a time (only the first
+        half plus one with *split*, i.e. without the mirrored part)."""
+        n_frames = self.count_gif_frames(filename, split)
+        with Image.open(filename) as gif_image:
+            for frame in range(start, n_frames):
+                gif_image.seek(frame)
+                yield gif_image.convert("RGBA")
+
+    def _render_frames(
+        self, stack: np.ndarray, overlay: Overlay | None, label: str = "Generating image ", start: int = 0
+    ) -> Iterator[Image.Image]:
+        """Yield the frames of the generations in *stack*, rendered
+        ``_RENDER_FRAMES`` at a time and logged as frames *start* + 1 on."""
+        stop = start + len(stack)
+        for first in range(0, len(stack), _RENDER_FRAMES):
+            images = self.render_stack(stack[first : first + _RENDER_FRAMES], overlay)
+            for index, image in enumerate(images, start + first):
+                tracelog(label, index + 1, "/", stop, sep="")
+                yield image
+
+    def _partial_box(self, box: tuple[int, int, int, int] | None) -> bool:
+        return box is not None and box != (0, 0, self.canvas_size[1], self.canvas_size[0])
+
+    def encode_frame(
+        self,
+        writer_cls: type[AnimationWriter],
+        image: Image.Image,
+        previous: Image.Image | None,
+        box: tuple[int, int, int, int] | None,
+    ) -> tuple[EncodedFrame, EncodedFrame | None]:
+        """Encode *image* (only *box* of it, drawn over *previous*, if
+        given) and, with *previous*, that frame over the same box drawn over
+        *image* for the way back (otherwise the previous frame itself is
+        reused, which needs both to be full frames)."""
+        if previous is None:
+            return writer_cls.prepare(image, box), None
+        forward = writer_cls.prepare(image, box, previous if self._partial_box(box) else None)
+        return forward, writer_cls.prepare(previous, box, image)
+
+    def encode_generation(
+        self,
+        writer_cls: type[AnimationWriter],
+        cells: np.ndarray,
+        previous: np.ndarray | None,
+        box: tuple[int, int, int, int] | None,
+        overlay: Overlay | None,
+    ) -> tuple[EncodedFrame, EncodedFrame | None]:
+        """Render the generation *cells* (and *previous*, if given) and
+        ``encode_frame`` it; what the frame pool workers run."""
+        if previous is None:
+            return self.encode_frame(writer_cls, self.generate_image(cells, True, overlay), None, box)
+        image, previous_image = self.render_stack(np.stack((cells, previous)), overlay)
+        return self.encode_frame(writer_cls, image, previous_image, box)
+
+    def _encode_generations(
+        self,
+        writer_cls: type[AnimationWriter],
+        cells: np.ndarray,
+        start: int,
+        stop: int,
+        overlay: Overlay | None,
+        store_file: Path | None = None,
+    ) -> Iterator[tuple[EncodedFrame, EncodedFrame | None]]:
+        """Yield ``encode_frame`` results for the generated frames *start*
+        to *stop*, in order, with ``-workers`` processes.  With *store_file*
+        the generations go through that frame store."""
+        n = max(stop - start, 0)
+        stack = self.simulate(cells, n) if store_file is None else self.simulate_stored(cells, n, store_file)
+        # the first generated frame follows a source frame, which has no cells
+        boxes = [None, *(self._changed_box(a, b) for a, b in zip(stack, stack[1:]))]
+        # a frame can only be reused for the way back if it and the frame
+        # after it are both full frames
+        partial = [self._partial_box(box) for box in boxes]
+        backs = [False, *(a or b for a, b in zip(partial, partial[1:]))]
+
+        workers = self.settings.workers or os.cpu_count() or 1
+        if workers == 1 or len(stack) < 2:
+            previous = None
+            for image, box, back in zip(self._render_frames(stack, overlay, start=start), boxes, backs):
+                yield self.encode_frame(writer_cls, image, previous if back else None, box)
+                previous = image
+            return
+        from .parallel import FramePool  # multiprocessing is only imported for -workers
+
+        def jobs() -> Iterator[tuple[np.ndarray, tuple[int, int, int, int] | None, bool]]:
+            for index, job in enumerate(zip(stack, boxes, backs), start):
+                tracelog("Generating image ", index + 1, "/", stop, sep="")
+                yield job
+
+        with FramePool(self, writer_cls, workers, cells.shape, overlay) as pool:
+            yield from pool.map(jobs())
+
     def create_gif(self, gif_path: Path) -> None:
         gif_split = gif_path.with_suffix("")
 
-        if gif_path.suffix.upper() == ".GIF":
-            images = self.read_gif(gif_path, as_numpy=False)
-            cells, _, overlay_mask, source_pixels = self.init_convert_game(images[-1])
+        if gif_path.suffix.lower() in PATTERN_SUFFIXES:
+            cells, overlay = self.init_pattern_game(gif_path), None
+            tracelog("Generating image ", 1, "/", self.settings.gif_length, sep="")
+            source_images = iter([self.generate_image(cells, indexed=True)])
+            start_frame = 1
+            gif_length = self.settings.gif_length
+        elif gif_path.suffix.upper() == ".GIF":
+            start_frame = self.count_gif_frames(gif_path)
+            last_image = next(self.iter_gif(gif_path, start=start_frame - 1))
+            cells, _, overlay = self.init_convert_game(last_image)
+            source_images = self.iter_gif(gif_path)
             gif_length = self.settings.gif_length
             if gif_length < 0:
-                gif_length = len(images) + 1
+                gif_length = start_frame + 1
         else:
-            images = []
-            cells, current_image, overlay_mask, source_pixels = self.init_running_game(gif_path)
+            cells, current_image, overlay = self.init_running_game(gif_path)
             tracelog("Generating image ", 1, "/", self.settings.gif_length, sep="")
-            images.append(current_image)
+            source_images = iter([current_image])
+            start_frame = 1
             gif_length = self.settings.gif_length
 
-        start_frame = len(images)
-        cell_gen = self.update_game(cells)
-        for frame_index in range(start_frame, gif_length):
-            tracelog("Generating image ", frame_index + 1, "/", gif_length, sep="")
-            cells = next(cell_gen)
-            images.append(self.generate_image(cells))
-
-        # Apply the overlay on top of every generated frame
-        images = [self._apply_overlay(img, overlay_mask, source_pixels) for img in images]
-
         frame_pause = max((400 // self.settings.gif_speed), 0)
-        frame_pause_images = [images[0] for _ in range(frame_pause)]
-        tracelog("Saving gif...")
-
-        images[0].save(
-            str(gif_split) + ".gif",
-            save_all=True,
-            append_images=frame_pause_images + images[1:] + images[-2::-1],
-            optimize=False,
-            duration=self.settings.gif_speed,
-            loop=0,
+        speed = self.settings.gif_speed
+        store_file = gif_split.with_name(gif_split.name + ".frames") if self.settings.frame_store else None
+        tracelog("Streaming", self.settings.format, "animation...")
+
+        # Frames are encoded as they are produced.  Between two generated
+        # frames only the box around the changed cells is stored; the way back
+        # needs the previous frame over that same box, which is encoded here as
+        # well so the mirrored half is written from stored blocks only.
+        with get_writer(self.settings.format, gif_split) as writer:
+            forward: list[int] = []
+            backward: list[int] = []
+            for image in source_images:
+                forward.append(writer.encode(self.index_image(overlay.apply(image) if overlay else image, overlay)))
+                if len(forward) > 1:
+                    backward.append(forward[-2])
+                writer.write(forward[-1], speed * (1 + frame_pause) if len(forward) == 1 else speed)
+            for encoded, encoded_back in self._encode_generations(
+                type(writer), cells, start_frame, gif_length, overlay or None, store_file
+            ):
+                forward.append(writer.store(encoded))
+                backward.append(forward[-2] if encoded_back is None else writer.store(encoded_back))
+                writer.write(forward[-1], speed)
+            for frame in backward[::-1]:
+                writer.write(frame, speed)
+        tracelog("Wrote", writer.frames_written, "frames,", writer.frames_encoded, "encoded, to", writer.path)
+        tracelog_peak_memory()
+
+    def _changed_box(self, cells_a: np.ndarray, cells_b: np.ndarray) -> tuple[int, int, int, int]:
+        """Return the pixel box (left, upper, right, lower) covering every cell
+        that differs between *cells_a* and *cells_b* (at least one pixel)."""
+        changed = cells_a != cells_b
+        rows = np.flatnonzero(changed.any(axis=1))
+        if not rows.size:
+            return (0, 0, 1, 1)
+        cols = np.flatnonzero(changed.any(axis=0))
+        cell_h, cell_w = self.cell_size
+        return (
+            int(cols[0]) * cell_w,
+            int(rows[0]) * cell_h,
+            min((int(cols[-1]) + 1) * cell_w, self.canvas_size[1]),
+            min((int(rows[-1]) + 1) * cell_h, self.canvas_size[0]),
         )
 
     def generate_transition(
         self,
         cells_from: np.ndarray,
         cells_to: np.ndarray,
-        probability: float,
-        previous_mask: np.ndarray,
-    ) -> tuple[np.ndarray, np.ndarray]:
-        rng = np.random.default_rng()
-        random_modifier = rng.choice([False, True], size=cells_from.shape, p=[0.25, 0.75])
-        previous_mask[previous_mask] = random_modifier[previous_mask]
-        random_mask = rng.choice(
-            [False, True], size=cells_from.shape, p=[1 - probability, probability]
-        )
-        random_mask[previous_mask] = True
-        transition_cells = np.copy(cells_from)
-        transition_cells[random_mask] = cells_to[random_mask]
-        return transition_cells, random_mask
+        probabilities: Sequence[float],
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Return the grids fading *cells_from* into *cells_to*, one per
+        frame *probability*, stacked as (frames, rows, cols).
+
+        Every cell draws one flip time up front and shows *cells_to* from the
+        first frame whose threshold reaches it, so a flipped cell stays
+        flipped.  The thresholds are the share of flipped cells the former
+        per-frame draws gave: a cell flipped with the frame's probability, or
+        if it was flipped in the frame before and stayed so."""
+        thresholds = np.empty(len(probabilities), dtype=np.float32)
+        share = 0.0
+        for frame, probability in enumerate(probabilities):
+            share = max(share, probability + (1 - probability) * _TRANSITION_STICKY * share)
+            thresholds[frame] = share
+        flip_times = rng.random(cells_from.shape, dtype=np.float32)
+        flipped = flip_times < thresholds[:, None, None]
+        return np.where(flipped, cells_to, cells_from).astype(np.uint8)
 
     def create_transition(self, from_image: Path, to_image: Path) -> None:
         gif_split = from_image.with_suffix("")
 
-        cells_from, current_image_from, overlay_mask_from, source_pixels_from = self.init_running_game(from_image)
-        cells_to,   current_image_to,   overlay_mask_to,   source_pixels_to   = self.init_running_game(to_image)
-
-        images_from = [current_image_from]
-        images_to = [current_image_to]
-        images_transition = []
+        cells_from, current_image_from, overlay_from = self.init_running_game(from_image)
+        cells_to,   current_image_to,   overlay_to   = self.init_running_game(to_image)
         tracelog(from_image, to_image)
 
         frame_count_split = self.settings.gif_length // 2
         frame_count_transition = max(5, self.settings.gif_length // 10)
-
-        cell_gen_from = self.update_game(cells_from)
-        cell_gen_to = self.update_game(cells_to)
-
-        for i in range(frame_count_split):
-            tracelog("Generating image (from) ", i + 1, "/", self.settings.gif_length, sep="")
-            cells_from = next(cell_gen_from)
-            images_from.append(self.generate_image(cells_from))
-
-        for i in range(frame_count_split, self.settings.gif_length):
-            tracelog("Generating image  (to)  ", i + 1, "/", self.settings.gif_length, sep="")
-            cells_to = next(cell_gen_to)
-            images_to.append(self.generate_image(cells_to))
-
-        random_mask = cells_from == cells_to
-        for i in range(1, frame_count_transition + 1):
-            tracelog("Generating transition   ", i, "/", frame_count_transition, sep="")
-            probability = i / (frame_count_transition + 1)
-            if probability < 0.1:
-                continue
-            if probability > 0.9:
-                break
-            cells_transition, random_mask = self.generate_transition(
-                cells_from, cells_to, probability, random_mask
-            )
-            images_transition.append(self.generate_image(cells_transition))
-
-        # Apply each image's own overlay; transition frames inherit the "from" overlay
-        images_from       = [self._apply_overlay(img, overlay_mask_from, source_pixels_from) for img in images_from]
-        images_to         = [self._apply_overlay(img, overlay_mask_to,   source_pixels_to)   for img in images_to]
-        images_transition = [self._apply_overlay(img, overlay_mask_from, source_pixels_from) for img in images_transition]
-
         frame_pause = max((600 // self.settings.gif_speed), 0)
-        frame_pause_from = [images_from[0] for _ in range(frame_pause)]
-        frame_pause_to = [images_to[0] for _ in range(frame_pause)]
-        tracelog("Saving gif...")
-
-        images_from[0].save(
-            str(gif_split) + "-transition.gif",
-            save_all=True,
-            append_images=(
-                frame_pause_from
-                + images_from[1:]
-                + images_transition
-                + images_to[::-1]
-                + frame_pause_to
-                + images_to[1:]
-                + images_transition[::-1]
-                + images_from[:0:-1]
-            ),
-            optimize=False,
-            duration=self.settings.gif_speed,
-            loop=0,
-        )
+        speed = self.settings.gif_speed
+        tracelog("Streaming", self.settings.format, "animation...")
+
+        # Each image keeps its own overlay (the source images already show
+        # it); transition frames inherit the "from" overlay
+        with get_writer(self.settings.format, Path(str(gif_split) + "-transition")) as writer:
+            frames_from = [writer.encode(current_image_from)]
+            writer.write(frames_from[0], speed * (1 + frame_pause))
+            stack_from = self.simulate(cells_from, frame_count_split)
+            for image in self._render_frames(stack_from, overlay_from, "Generating image (from) "):
+                frames_from.append(writer.encode(image))
+                writer.write(frames_from[-1], speed)
+
+            # the "to" frames are shown backwards first, so they are only encoded here
+            frames_to = [writer.encode(current_image_to)]
+            stack_to = self.simulate(cells_to, max(self.settings.gif_length - frame_count_split, 0))
+            for image in self._render_frames(
+                stack_to, overlay_to, "Generating image  (to)  ", frame_count_split
+            ):
+                frames_to.append(writer.encode(image))
+
+            # the transition goes from the last "from" to the last "to" generation
+            if len(stack_from):
+                cells_from = stack_from[-1]
+            if len(stack_to):
+                cells_to = stack_to[-1]
+            frames_transition: list[int] = []
+            probabilities = [i / (frame_count_transition + 1) for i in range(1, frame_count_transition + 1)]
+            probabilities = [p for p in probabilities if 0.1 <= p <= 0.9]
+            transition = self.generate_transition(
+                cells_from, cells_to, probabilities, np.random.default_rng(self.settings.seed)
+            )
+            for image in self._render_frames(transition, overlay_from, "Generating transition   "):
+                frames_transition.append(writer.encode(image))
+                writer.write(frames_transition[-1], speed)
+
+            for frame in frames_to[:0:-1]:
+                writer.write(frame, speed)
+            writer.write(frames_to[0], speed * (1 + frame_pause))
+            for frame in frames_to[1:] + frames_transition[::-1] + frames_from[:0:-1]:
+                writer.write(frame, speed)
+        tracelog("Wrote", writer.frames_written, "frames,", writer.frames_encoded, "encoded, to", writer.path)
+        tracelog_peak_memory()
+
+
+def run_themes(engines: Sequence[GameOfLifeEngine]) -> None:
+    """Run several colour themes of the same game in one process.
+
+    When every theme advances an existing image, each image is read once.
+    If all of them hold the same board it is stepped once and each theme
+    only renders and saves its own files; otherwise each board is stepped
+    on its own.  Anything else runs each theme on its own."""
+    settings = [engine.settings for engine in engines]
+    if len(engines) < 2 or any(
+        s.gif or s.from_transition or s.to_transition or s.advance for s in settings
+    ) or not all(engine.target_image.exists() for engine in engines):
+        for engine in engines:
+            engine.run()
+        return
+
+    tracelog("reading game state of", len(engines), "themes...")
+    loaded: list[tuple[GameOfLifeEngine, tuple[np.ndarray, Overlay | None]]] = []
+    for engine in engines:
+        engine.check_pattern()
+        try:
+            loaded.append((engine, engine.load_game(engine.target_image)))
+        except Exception as exc:
+            engine.restart_game(exc)
+    if not loaded:
+        return
+
+    shared: np.ndarray | None = None
+    boards = [game[0] for _, game in loaded]
+    if all(np.array_equal(boards[0], board) for board in boards[1:]):
+        tracelog("updating game cycle...")
+        shared = next(loaded[0][0].iterate_game(boards[0]))
+    else:
+        tracelog("themes hold different boards, updating them one by one...")
+    for engine, game in loaded:
+        tracelog("saving theme", engine.settings.name, "...")
+        try:
+            cells = shared if shared is not None else next(engine.iterate_game(game[0]))
+            engine.save_generation(game, cells)
+        except Exception as exc:
+            engine.restart_game(exc)
@@ -0,0 +1,235 @@
+from __future__ import annotations
+
+from typing import TypeAlias
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# HashLife
+# ---------------------------------------------------------------------------
+#
+# Quadtree Game of Life with canonicalised nodes and memoised successors, used
+# to jump a board forward by many generations at once.  The engine treats
+# everything outside the board as permanently dead, so leaves carry a third
+# "wall" state: walls count as dead neighbours and are never born.  The board
+# is embedded in an infinite wall, which is static and therefore as cheap to
+# memoise as empty space.
+
+_DEAD = 0
+_ALIVE = 1
+_WALL = 2
+
+# a quadtree entry: a leaf cell state at level 0, a _Node above it
+_Quad: TypeAlias = "_Node | int"
+
+
+class _Node:
+    __slots__ = ("level", "nw", "ne", "sw", "se")
+
+    def __init__(self, level: int, nw, ne, sw, se) -> None:
+        self.level = level
+        self.nw = nw
+        self.ne = ne
+        self.sw = sw
+        self.se = se
+
+
+class HashLife:
+    """Advance a board by *n* generations in roughly O(log n) node steps.
+
+    Canonical nodes live in a hash table and successors are memoised per
+    (node, step) pair.  Once the table grows past *max_nodes* the cache is
+    evicted: memoised results are dropped and only the nodes reachable from
+    the current root are kept."""
+
+    def __init__(self, max_nodes: int = 1 << 20) -> None:
+        self.max_nodes = max_nodes
+        self.evictions = 0
+        self._nodes: dict[tuple, _Node] = {}
+        self._results: dict[tuple[_Node, int], _Node] = {}
+        self._walls: list[_Quad] = [_WALL]
+        self._deads: list[_Quad] = [_DEAD]
+        self._root: _Node | None = None
+
+    # -- node construction ---------------------------------------------------
+
+    def _join(self, nw: _Quad, ne: _Quad, sw: _Quad, se: _Quad) -> _Node:
+        key = (nw, ne, sw, se)
+        node = self._nodes.get(key)
+        if node is None:
+            level = 1 if isinstance(nw, int) else nw.level + 1
+            node = self._nodes[key] = _Node(level, nw, ne, sw, se)
+        return node
+
+    def _uniform(self, cache: list[_Quad], level: int) -> _Quad:
+        while len(cache) <= level:
+            child = cache[-1]
+            cache.append(self._join(child, child, child, child))
+        return cache[level]
+
+    def _center(self, node: _Node) -> _Node:
+        return self._join(node.nw.se, node.ne.sw, node.sw.ne, node.se.nw)
+
+    def _expand(self, node: _Node) -> _Node:
+        wall = self._uniform(self._walls, node.level - 1)
+        return self._join(
+            self._join(wall, wall, wall, node.nw),
+            self._join(wall, wall, node.ne, wall),
+            self._join(wall, node.sw, wall, wall),
+            self._join(node.se, wall, wall, wall),
+        )
+
+    # -- evolution -------------------------------------------------------------
+
+    def _base(self, node: _Node) -> _Node:
+        """Advance a 4x4 node by one generation and return its 2x2 centre."""
+        grid = [
+            [node.nw.nw, node.nw.ne, node.ne.nw, node.ne.ne],
+            [node.nw.sw, node.nw.se, node.ne.sw, node.ne.se],
+            [node.sw.nw, node.sw.ne, node.se.nw, node.se.ne],
+            [node.sw.sw, node.sw.se, node.se.sw, node.se.se],
+        ]
+        out = []
+        for r in (1, 2):
+            for c in (1, 2):
+                cell = grid[r][c]
+                if cell == _WALL:
+                    out.append(_WALL)
+                    continue
+                alive = sum(
+                    grid[r + dr][c + dc] == _ALIVE
+                    for dr in (-1, 0, 1)
+                    for dc in (-1, 0, 1)
+                    if dr or dc
+                )
+                out.append(_ALIVE if alive == 3 or (alive == 2 and cell == _ALIVE) else _DEAD)
+        return self._join(*out)
+
+    def _successor(self, node: _Node, step: int) -> _Node:
+        """Return the centre of *node* advanced by 2**step generations
+        (``step <= node.level - 2``)."""
+        key = (node, step)
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        if node.level == 2:
+            result = self._base(node)
+        else:
+            nw, ne, sw, se = node.nw, node.ne, node.sw, node.se
+            join = self._join
+            parts = [
+                nw,
+                join(nw.ne, ne.nw, nw.se, ne.sw),
+                ne,
+                join(nw.sw, nw.se, sw.nw, sw.ne),
+                join(nw.se, ne.sw, sw.ne, se.nw),
+                join(ne.sw, ne.se, se.nw, se.ne),
+                sw,
+                join(sw.ne, se.nw, sw.se, se.sw),
+                se,
+            ]
+            full = step == node.level - 2
+            inner = step - 1 if full else step
+            p = [self._successor(part, inner) for part in parts]
+            quads = [
+                join(p[0], p[1], p[3], p[4]),
+                join(p[1], p[2], p[4], p[5]),
+                join(p[3], p[4], p[6], p[7]),
+                join(p[4], p[5], p[7], p[8]),
+            ]
+            if full:
+                result = join(*(self._successor(quad, inner) for quad in quads))
+            else:
+                result = join(*(self._center(quad) for quad in quads))
+
+        self._results[key] = result
+        return result
+
+    def _evict(self) -> None:
+        """Drop all memoised successors and every node the root cannot reach."""
+        keep: dict[tuple, _Node] = {}
+        stack = [self._root, *self._walls[1:], *self._deads[1:]]
+        while stack:
+            node = stack.pop()
+            if not isinstance(node, _Node):
+                continue
+            key = (node.nw, node.ne, node.sw, node.se)
+            if key in keep:
+                continue
+            keep[key] = node
+            stack.extend(key)
+        self._nodes = keep
+        self._results.clear()
+        self.evictions += 1
+
+    # -- conversion ------------------------------------------------------------
+
+    def _build(self, cells: np.ndarray, top: int, left: int, level: int) -> _Quad:
+        size = 1 << level
+        rows, cols = cells.shape
+        if top >= rows or left >= cols or top + size <= 0 or left + size <= 0:
+            return self._uniform(self._walls, level)
+        if level == 0:
+            return _ALIVE if cells[top, left] else _DEAD
+        inside = top >= 0 and left >= 0 and top + size <= rows and left + size <= cols
+        if inside and not cells[top : top + size, left : left + size].any():
+            return self._uniform(self._deads, level)
+        half = size // 2
+        return self._join(
+            self._build(cells, top, left, level - 1),
+            self._build(cells, top, left + half, level - 1),
+            self._build(cells, top + half, left, level - 1),
+            self._build(cells, top + half, left + half, level - 1),
+        )
+
+    def _fill(self, node: _Quad, out: np.ndarray, top: int, left: int, level: int) -> None:
+        size = 1 << level
+        rows, cols = out.shape
+        if top >= rows or left >= cols or top + size <= 0 or left + size <= 0:
+            return
+        if isinstance(node, int):  # level 0
+            out[top, left] = node == _ALIVE
+            return
+        if node is self._uniform(self._deads, level):
+            return
+        half = size // 2
+        self._fill(node.nw, out, top, left, level - 1)
+        self._fill(node.ne, out, top, left + half, level - 1)
+        self._fill(node.sw, out, top + half, left, level - 1)
+        self._fill(node.se, out, top + half, left + half, level - 1)
+
+    # -- public API ------------------------------------------------------------
+
+    def advance(self, cells: np.ndarray, generations: int) -> np.ndarray:
+        """Return the alive cells (uint8 0/1) of *cells* after *generations*."""
+        if generations < 0:
+            raise ValueError("generations must not be negative")
+        rows, cols = cells.shape
+        alive = np.asarray(cells) > 0
+
+        # the board sits inside the centre half of the root, *offset* cells
+        # from its top-left corner
+        level = max(3, int(max(rows, cols) - 1).bit_length() + 1)
+        offset = 1 << (level - 2)
+        root = self._build(alive, -offset, -offset, level)
+        assert isinstance(root, _Node)  # level >= 3
+        self._root = root
+
+        step = 0
+        while generations >> step:
+            if (generations >> step) & 1:
+                while root.level < step + 2:
+                    offset += 1 << (root.level - 1)
+                    root = self._expand(root)
+                # the successor is the centre half; expanding restores the frame
+                root = self._expand(self._successor(root, step))
+                self._root = root
+                if len(self._nodes) > self.max_nodes:
+                    self._evict()
+            step += 1
+
+        out = np.zeros((rows, cols), dtype=np.uint8)
+        self._fill(root, out, -offset, -offset, root.level)
+        self._root = None
+        return out
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Board history
+# ---------------------------------------------------------------------------
+#
+# Every run stores the hashes of the most recent generations in a small text
+# sidecar next to the image, oldest first, one hex digest per line.  A new
+# generation whose hash is already in the history repeats an earlier board, so
+# the game has settled into a cycle whose period is its distance from the end.
+
+
+def board_hash(cells: np.ndarray) -> str:
+    """Hash the alive cells of *cells* (anything > 0) together with its shape."""
+    alive = np.ascontiguousarray(np.asarray(cells) > 0)
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(np.asarray(alive.shape, dtype="<u4").tobytes())
+    digest.update(np.packbits(alive).tobytes())
+    return digest.hexdigest()
+
+
+def load_history(history_file: Path, current: str) -> list[str]:
+    """Return the stored history if it ends with the *current* board, otherwise
+    a fresh history holding only *current* (missing, unreadable or stale
+    files, e.g. after the image was edited by hand)."""
+    try:
+        history = history_file.read_text(encoding="utf-8").split()
+    except OSError:
+        return [current]
+    if not history or history[-1] != current:
+        return [current]
+    return history
+
+
+def cycle_period(history: list[str], digest: str) -> int:
+    """Return the period of the cycle *digest* closes, or 0 if it is new."""
+    for distance, previous in enumerate(reversed(history), start=1):
+        if previous == digest:
+            return distance
+    return 0
+
+
+def save_history(history_file: Path, history: list[str], period: int) -> None:
+    """Write the last *period* entries of *history* to *history_file*."""
+    try:
+        history_file.write_text("\n".join(history[-period:]) + "\n", encoding="utf-8")
+    except OSError:
+        return
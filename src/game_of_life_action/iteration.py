@@ -31,20 +31,24 @@ def iteration_image_content(r: int, g: int, b: int) -> str:
 """.strip()
 
 
-def update_iteration(image_file: Path, color: tuple[int, int, int, int], increment: bool) -> None:
+def update_iteration(
+    image_file: Path, color: tuple[int, int, int, int], increment: bool, step: int = 1
+) -> int | None:
+    """Update the counter in *image_file* and return the new iteration, or
+    None if the counter could not be read or written."""
     if not image_file.exists():
         image_file.write_text(iteration_image_content(*color[:3]), encoding="utf-8")
-        return
+        return 0
 
     try:
         content = image_file.read_text(encoding="utf-8")
     except OSError:
-        return
+        return None
 
     start = content.find("<h1>")
     end = content.find("</h1>")
     if start == -1 or end == -1 or end <= start + 4:
-        return
+        return None
 
     header_content = content[start + 4 : end]
     current_iteration = 0
@@ -55,7 +59,7 @@ def update_iteration(image_file: Path, color: tuple[int, int, int, int], increme
                 break
             suffix_digits += char
         if suffix_digits:
-            current_iteration = int(suffix_digits[::-1]) + 1
+            current_iteration = int(suffix_digits[::-1]) + step
 
     new_header = f"Current Iteration: {current_iteration}"
     updated = content.replace(header_content, new_header, 1)
@@ -63,4 +67,5 @@ def update_iteration(image_file: Path, color: tuple[int, int, int, int], increme
     try:
         image_file.write_text(updated, encoding="utf-8")
     except OSError:
-        return
+        return None
+    return current_iteration
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+from PIL import Image
+
+# ---------------------------------------------------------------------------
+# Overlay
+# ---------------------------------------------------------------------------
+#
+# Pixels of a board image that are none of the three game colours (text or a
+# logo drawn over the board) are kept across generations.  RGBA pixels are
+# compared as packed uint32 keys and only the foreign ones are stored: their
+# flat canvas positions in ascending order and their packed colours.  The
+# colours are numbered as well, so a palette-indexed frame takes the overlay
+# by writing indices behind the three game colours and an RGBA frame by
+# writing the packed colours, either way straight into the pixel buffer the
+# frame was just rendered into.
+
+Color = tuple[int, int, int, int]
+
+# palette entries left for overlay colours in a P frame after the game colours
+_INDEXED_COLORS = 256 - 3
+
+
+def pack_rgba(pixels: np.ndarray) -> np.ndarray:
+    """View (H, W, 4) uint8 *pixels* as (H, W) uint32 keys."""
+    return np.ascontiguousarray(pixels, dtype=np.uint8).view(np.uint32)[..., 0]
+
+
+def pack_colors(colors: Sequence[Color]) -> np.ndarray:
+    return np.array(colors, dtype=np.uint8).view(np.uint32).ravel()
+
+
+@dataclass(slots=True)
+class Overlay:
+    shape: tuple[int, int]
+    positions: np.ndarray
+    colors: np.ndarray
+    palette: np.ndarray
+    indices: np.ndarray | None
+
+    @classmethod
+    def extract(cls, keys: np.ndarray, game_colors: Sequence[Color]) -> Overlay:
+        """Collect the pixels of packed *keys* that are not one of the
+        *game_colors*."""
+        flat = keys.ravel()
+        dead, alive, dying = pack_colors(game_colors)
+        positions = np.flatnonzero((flat != dead) & (flat != alive) & (flat != dying))
+        colors = flat[positions]
+        palette, inverse = np.unique(colors, return_inverse=True)
+        indices = None
+        if palette.size <= _INDEXED_COLORS:
+            indices = (inverse.ravel() + 3).astype(np.uint8)
+        return cls(keys.shape, positions, colors, palette, indices)
+
+    def __bool__(self) -> bool:
+        return bool(self.positions.size)
+
+    def paint(self, pixels: np.ndarray) -> None:
+        """Write the overlay into packed (H, W) uint32 *pixels*."""
+        np.put(pixels, self.positions, self.colors)
+
+    def apply(self, image: Image.Image) -> Image.Image:
+        """Return *image* as RGBA with the overlay on top of it."""
+        if not self:
+            return image
+        pixels = np.array(image.convert("RGBA"))
+        self.paint(pack_rgba(pixels))
+        return Image.fromarray(pixels)
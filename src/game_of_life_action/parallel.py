@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import replace
+from multiprocessing.shared_memory import SharedMemory
+from types import TracebackType
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .overlay import Overlay
+
+# ---------------------------------------------------------------------------
+# Frame pool
+# ---------------------------------------------------------------------------
+#
+# Stepping stays in the parent; rendering, overlay compositing and encoding of
+# each generation run in worker processes.  The parent copies every cell grid
+# into a ring of slots in one shared memory block and only sends slot numbers
+# and boxes to the workers.  A job needs its own slot and the previous one (to
+# encode the previous frame over the changed box for the way back, where that
+# is needed), so at most ``slots - 2`` jobs are in flight and results are
+# handed back in submission order.
+
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(
+    engine_cls: type,
+    settings: object,
+    canvas_size: tuple[int, int],
+    cell_size: tuple[int, int],
+    writer_cls: type,
+    shm_name: str,
+    shape: tuple[int, int, int],
+    overlay: Overlay | None,
+) -> None:
+    engine = engine_cls(settings)
+    engine.canvas_size = canvas_size
+    engine.cell_size = cell_size
+    shm = SharedMemory(name=shm_name)
+    _worker.update(
+        engine=engine,
+        writer_cls=writer_cls,
+        shm=shm,
+        grids=np.ndarray(shape, dtype=np.uint8, buffer=shm.buf),
+        overlay=overlay,
+    )
+
+
+def _encode_slot(slot: int, previous_slot: int, box: tuple[int, int, int, int] | None, back: bool):
+    grids = _worker["grids"]
+    previous = grids[previous_slot] if back else None
+    return _worker["engine"].encode_generation(
+        _worker["writer_cls"], grids[slot], previous, box, _worker["overlay"]
+    )
+
+
+class FramePool:
+    """Encode generations of *engine* with *workers* processes, see above."""
+
+    def __init__(
+        self,
+        engine: Any,
+        writer_cls: type,
+        workers: int,
+        shape: tuple[int, int],
+        overlay: Overlay | None,
+    ) -> None:
+        self.in_flight = 2 * workers
+        self.slots = self.in_flight + 2
+        rows, cols = shape
+        self._shm = SharedMemory(create=True, size=self.slots * rows * cols)
+        self._grids = np.ndarray((self.slots, rows, cols), dtype=np.uint8, buffer=self._shm.buf)
+        self._executor = ProcessPoolExecutor(
+            workers,
+            initializer=_init_worker,
+            initargs=(
+                type(engine),
+                replace(engine.settings, rendered={}),  # workers get cells, not source images
+                engine.canvas_size,
+                engine.cell_size,
+                writer_cls,
+                self._shm.name,
+                self._grids.shape,
+                overlay,
+            ),
+        )
+
+    def __enter__(self) -> FramePool:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def map(self, jobs: Iterable[tuple[np.ndarray, tuple[int, int, int, int] | None, bool]]) -> Iterator[Any]:
+        """Yield ``encode_generation`` results for ``(cells, box, back)``
+        *jobs*, where each job's previous grid is the one of the job before
+        it and is only encoded with *back*."""
+        pending: deque[Future] = deque()
+        for index, (cells, box, back) in enumerate(jobs):
+            if len(pending) == self.in_flight:
+                yield pending.popleft().result()
+            slot = index % self.slots
+            self._grids[slot] = cells
+            pending.append(self._executor.submit(_encode_slot, slot, (index - 1) % self.slots, box, back))
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+        del self._grids
+        self._shm.close()
+        self._shm.unlink()
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# New boards
+# ---------------------------------------------------------------------------
+#
+# A new board is either random over the whole grid or a random 16x16 soup in
+# the middle of an empty grid (pattern files are read below).  Random
+# cells come from the raw 64-bit output of PCG64, read as little-endian 16-bit
+# values and compared against the density.  Unlike the Generator methods,
+# that stream is fixed for a seed, so a seeded board is the same with every
+# numpy version and on every platform.
+
+SOUP_SIZE = 16
+PATTERN_SUFFIXES = (".rle", ".cells")
+
+
+def random_cells(shape: tuple[int, int], density: float, bit_generator: np.random.PCG64) -> np.ndarray:
+    """Return (rows, cols) cells, each alive with chance *density*."""
+    size = shape[0] * shape[1]
+    raw = bit_generator.random_raw(-(-size // 4))
+    values = raw.astype("<u8", copy=False).view("<u2")[:size]
+    return (values < np.int32(round(density * 0x10000))).astype(np.uint8).reshape(shape)
+
+
+def place(pattern: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    """Return *pattern* in the middle of an empty grid of *shape*."""
+    rows, cols = pattern.shape
+    if rows > shape[0] or cols > shape[1]:
+        raise ValueError(f"pattern of {rows}x{cols} cells does not fit the {shape[0]}x{shape[1]} grid")
+    board = np.zeros(shape, dtype=np.uint8)
+    top, left = (shape[0] - rows) // 2, (shape[1] - cols) // 2
+    board[top : top + rows, left : left + cols] = pattern
+    return board
+
+
+@lru_cache(maxsize=4)
+def new_board(shape: tuple[int, int], seed: int, density: float, pattern: str) -> np.ndarray:
+    """Return the read-only new *pattern* ("random" or "soup") board for
+    *seed*; themes starting over with the same settings share it."""
+    if pattern == "soup":
+        size = (min(SOUP_SIZE, shape[0]), min(SOUP_SIZE, shape[1]))
+        board = place(random_cells(size, density, np.random.PCG64(seed)), shape)
+    else:
+        board = random_cells(shape, density, np.random.PCG64(seed))
+    board.flags.writeable = False
+    return board
+
+
+# ---------------------------------------------------------------------------
+# Pattern files
+# ---------------------------------------------------------------------------
+#
+# Run length encoded (``.rle``): ``#`` comment lines, a ``x = COLS, y = ROWS``
+# header and runs like ``3o2b$`` (``o`` alive, ``b`` dead, ``$`` next row,
+# ``!`` end).  Plaintext (``.cells``): ``!`` comment lines, one row per line
+# with ``O`` alive and ``.`` dead.  Both are read without any image decoding;
+# RLE runs are parsed as arrays over the text bytes rather than one regex
+# match each.  Patterns are written for the whole grid, so a board read back
+# from its export has the same size.
+
+_RLE_HEADER = re.compile(r"x\s*=\s*(\d+)\s*,\s*y\s*=\s*(\d+)")
+_RLE_WIDTH = 70
+
+
+def read_rle(text: str) -> np.ndarray:
+    lines = [line for line in text.splitlines() if not line.startswith("#")]
+    if not lines or not (header := _RLE_HEADER.match(lines[0].strip())):
+        raise ValueError("RLE pattern without 'x = COLS, y = ROWS' header")
+    cols, rows = int(header[1]), int(header[2])
+    body = np.frombuffer("".join("".join(lines[1:]).split()).partition("!")[0].encode(), dtype=np.uint8)
+
+    # every non-digit is a tag, the digits before it its run length
+    digit = (body >= ord("0")) & (body <= ord("9"))
+    tags = np.flatnonzero(~digit)
+    digits = np.flatnonzero(digit)
+    owner = np.searchsorted(tags, digits)
+    if owner.size and owner[-1] == tags.size:
+        raise ValueError("RLE pattern ends in a run length without a tag")
+    place_value = 10.0 ** (tags[owner] - digits - 1)
+    counts = np.bincount(owner, (body[digits] - ord("0")) * place_value, tags.size).astype(np.int64)
+    counts[np.bincount(owner, minlength=tags.size) == 0] = 1
+
+    # "$" moves down by its count and back to column 0; other tags move right
+    tag = body[tags]
+    newline = tag == ord("$")
+    row = np.cumsum(np.where(newline, counts, 0)) - np.where(newline, counts, 0)
+    advance = np.where(newline, 0, counts)
+    end = np.cumsum(advance)
+    line_start = np.maximum.accumulate(np.where(newline, end, 0))
+    col = end - advance - line_start
+
+    alive = ~newline & (tag != ord("b")) & (tag != ord("."))
+    row, col, count = row[alive], col[alive], counts[alive]
+    if row.size and (row.max() >= rows or (col + count).max() > cols):
+        raise ValueError(f"RLE pattern exceeds its {cols}x{rows} header")
+    # alive runs as +1/-1 edges in the flat grid, filled in by a running sum
+    start = row * cols + col
+    size = rows * cols + 1
+    edges = np.bincount(start, minlength=size) - np.bincount(start + count, minlength=size)
+    return (np.cumsum(edges[:-1]) > 0).astype(np.uint8).reshape(rows, cols)
+
+
+def read_cells(text: str) -> np.ndarray:
+    lines = [line.rstrip() for line in text.splitlines() if not line.startswith("!")]
+    cols = max((len(line) for line in lines), default=0)
+    cells = np.zeros((len(lines), cols), dtype=np.uint8)
+    for row, line in enumerate(lines):
+        cells[row, : len(line)] = np.frombuffer(line.encode(), dtype=np.uint8) == ord("O")
+    return cells
+
+
+def read_pattern(path: Path) -> np.ndarray:
+    """Return the cells of the ``.rle`` or ``.cells`` file *path*."""
+    text = path.read_text()
+    cells = read_cells(text) if path.suffix.lower() == ".cells" else read_rle(text)
+    if not cells.size:
+        raise ValueError(f"{path.name} holds an empty pattern")
+    return cells
+
+
+def _alive_runs(cells: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Return row, first and last + 1 column of every run of alive cells."""
+    rows, cols = cells.shape
+    # a dead column on both sides keeps runs from crossing rows
+    padded = np.zeros((rows, cols + 2), dtype=np.int8)
+    padded[:, 1:-1] = np.asarray(cells) > 0
+    edges = np.diff(padded.ravel())
+    starts = np.flatnonzero(edges == 1) + 1
+    stops = np.flatnonzero(edges == -1) + 1
+    return starts // (cols + 2), starts % (cols + 2) - 1, stops % (cols + 2) - 1
+
+
+def _run(count: int, tag: str) -> str:
+    return f"{count}{tag}" if count > 1 else tag
+
+
+def write_rle(cells: np.ndarray, comments: Sequence[str] = ()) -> str:
+    """Return *cells* (alive where > 0) as RLE text."""
+    rows, cols = cells.shape
+    tokens = []
+    row = col = 0
+    for run_row, start, stop in zip(*(part.tolist() for part in _alive_runs(cells))):
+        if run_row != row:
+            tokens.append(_run(run_row - row, "$"))
+            row, col = run_row, 0
+        if start > col:
+            tokens.append(_run(start - col, "b"))
+        tokens.append(_run(stop - start, "o"))
+        col = stop
+    tokens.append("!")
+
+    lines = [f"#C {comment}" for comment in comments]
+    lines.append(f"x = {cols}, y = {rows}, rule = B3/S23")
+    line = ""
+    for token in tokens:
+        if len(line) + len(token) > _RLE_WIDTH:
+            lines.append(line)
+            line = ""
+        line += token
+    lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def write_cells(cells: np.ndarray, comments: Sequence[str] = ()) -> str:
+    """Return *cells* (alive where > 0) as plaintext ``.cells`` text."""
+    chars = np.where(np.asarray(cells) > 0, ord("O"), ord(".")).astype(np.uint8)
+    lines = [f"!{comment}" for comment in comments]
+    lines.extend(row.tobytes().decode() for row in chars)
+    return "\n".join(lines) + "\n"
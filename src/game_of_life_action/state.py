@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Board state sidecar
+# ---------------------------------------------------------------------------
+#
+# ``NAME.state`` stores what a run would otherwise recover by decoding
+# ``NAME.png``: the bit-packed alive cells, the palette, the canvas and cell
+# size and the generation counter.  It also holds a digest of the PNG bytes it
+# was written with, so a state whose image was replaced or edited is ignored.
+#
+#   header  : magic, version, rows, cols, canvas h/w, cell h/w, generation
+#   palette : cdead, calive, cdying as RGBA bytes
+#   digest  : blake2b-128 of the PNG file
+#   cells   : np.packbits of the (rows, cols) alive grid
+
+_MAGIC = b"GOLS"
+_VERSION = 1
+_HEADER = struct.Struct("<4sB6IQ12s16s")
+
+Color = tuple[int, int, int, int]
+
+
+@dataclass(slots=True)
+class BoardState:
+    cells: np.ndarray
+    canvas: tuple[int, int]
+    cell_size: tuple[int, int]
+    palette: tuple[Color, Color, Color]
+    generation: int
+    digest: bytes
+
+
+def png_digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+def read_state(state_file: Path) -> BoardState | None:
+    """Return the state stored in *state_file*, or None if it is missing or
+    not a state file this version understands."""
+    try:
+        data = state_file.read_bytes()
+    except OSError:
+        return None
+    if len(data) < _HEADER.size:
+        return None
+    magic, version, rows, cols, canvas_h, canvas_w, cell_h, cell_w, generation, palette, digest = (
+        _HEADER.unpack_from(data)
+    )
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    packed = np.frombuffer(data, dtype=np.uint8, offset=_HEADER.size)
+    if packed.size != -(-(rows * cols) // 8):
+        return None
+    cells = np.unpackbits(packed, count=rows * cols).reshape(rows, cols)
+    colors = tuple(tuple(palette[i : i + 4]) for i in range(0, 12, 4))
+    return BoardState(
+        cells=cells,
+        canvas=(canvas_h, canvas_w),
+        cell_size=(cell_h, cell_w),
+        palette=colors,  # type: ignore[arg-type]
+        generation=generation,
+        digest=digest,
+    )
+
+
+def write_state(state_file: Path, state: BoardState) -> None:
+    rows, cols = state.cells.shape
+    header = _HEADER.pack(
+        _MAGIC,
+        _VERSION,
+        rows,
+        cols,
+        *state.canvas,
+        *state.cell_size,
+        state.generation,
+        bytes(channel for color in state.palette for channel in color),
+        state.digest,
+    )
+    packed = np.packbits(np.asarray(state.cells) > 0)
+    try:
+        state_file.write_bytes(header + packed.tobytes())
+    except OSError:
+        return
@@ -0,0 +1,297 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+
+from .tracing import tracelog
+
+# ---------------------------------------------------------------------------
+# Stepping backends
+# ---------------------------------------------------------------------------
+#
+# Every backend works on a (rows, cols) uint8 array of alive cells (0/1) with
+# dead cells assumed outside the board.  A generation is split into three
+# calls so callers can decide how often the neighbour stencil runs:
+#
+#   counts = stepper.count(alive)          # one stencil pass
+#   alive  = stepper.advance(alive, counts)  # next generation (uint8 0/1)
+#   dying  = stepper.dying(alive, counts)    # bool, alive cells about to die
+#
+# *counts* is backend specific and must only be handed back to the stepper
+# that produced it.  ``run`` chains these so the counts of one generation
+# give both its dying mask and the next generation: one stencil pass each.
+
+
+class Stepper:
+    name = ""
+
+    def count(self, alive: np.ndarray) -> object:
+        raise NotImplementedError
+
+    def advance(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        raise NotImplementedError
+
+    def dying(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        raise NotImplementedError
+
+    def step(self, alive: np.ndarray) -> np.ndarray:
+        return self.advance(alive, self.count(alive))
+
+    def run(self, alive: np.ndarray) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        """Yield ``(alive, dying)`` for every following generation."""
+        counts = self.count(alive)
+        while True:
+            alive = self.advance(alive, counts)
+            counts = self.count(alive)
+            yield alive, self.dying(alive, counts)
+
+
+class ConvolveStepper(Stepper):
+    """Reference backend: neighbour counts via ``scipy.ndimage.convolve``.
+
+    SciPy is optional and only imported once this backend counts."""
+
+    name = "convolve"
+
+    def __init__(self) -> None:
+        self.kernel = np.ones((3, 3), dtype=np.uint8)
+        self.kernel[1, 1] = 0
+
+    def count(self, alive: np.ndarray) -> np.ndarray:
+        from scipy.ndimage import convolve
+
+        return convolve(alive, self.kernel, mode="constant")
+
+    def advance(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        num_alive = counts
+        return ((alive & (num_alive == 2)) | (num_alive == 3)).astype(np.uint8)  # type: ignore[operator]
+
+    def dying(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        num_alive = counts
+        return (alive == 1) & ((num_alive < 2) | (num_alive > 3))  # type: ignore[operator]
+
+
+class SlicedStepper(ConvolveStepper):
+    """Pure NumPy backend: sums the eight shifted views of a zero-padded board."""
+
+    name = "numpy"
+
+    def count(self, alive: np.ndarray) -> np.ndarray:
+        rows, cols = alive.shape
+        padded = np.zeros((rows + 2, cols + 2), dtype=np.uint8)
+        padded[1:-1, 1:-1] = alive
+        num_alive = padded[:-2, :-2] + padded[:-2, 1:-1]
+        num_alive += padded[:-2, 2:]
+        num_alive += padded[1:-1, :-2]
+        num_alive += padded[1:-1, 2:]
+        num_alive += padded[2:, :-2]
+        num_alive += padded[2:, 1:-1]
+        num_alive += padded[2:, 2:]
+        return num_alive
+
+
+def _dilate(mask: np.ndarray) -> np.ndarray:
+    """Grow a 2-D boolean mask by one entry in all eight directions."""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    rows = grown.copy()
+    grown[:, 1:] |= rows[:, :-1]
+    grown[:, :-1] |= rows[:, 1:]
+    return grown
+
+
+class TileStepper(SlicedStepper):
+    """Active-region backend for mostly still boards.
+
+    The board is split into ``tile`` x ``tile`` blocks.  A cell can only change
+    if something in its neighbourhood changed in the previous generation, so
+    each step only recomputes the tiles that changed last time plus their
+    neighbours; everything else is left where it is.
+
+    The active tiles are gathered into one (n, tile, tile) stack and stepped
+    in a single pass, and only the tiles that changed are written back, so a
+    step costs time in proportion to the active tiles, not the board.  Once
+    more than a third of the tiles are active, gathering them costs more than
+    stepping the whole board, which is then done in one pass instead.  The
+    ``(alive, dying)`` arrays yielded are updated in place by the next step."""
+
+    name = "tiles"
+    tile = 16
+    # step the whole board at once when more than 1/ratio of the tiles are active
+    full_pass_ratio = 3
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.active_tiles = 0
+        self._logged_tiles = -1
+
+    def _blocks(self, array: np.ndarray) -> np.ndarray:
+        """View the (rows, cols) *array* as (tile rows, tile cols, tile, tile)."""
+        rows, cols = array.shape
+        return array.reshape(rows // self.tile, self.tile, cols // self.tile, self.tile).swapaxes(1, 2)
+
+    def run(self, alive: np.ndarray) -> Iterator[tuple[np.ndarray, np.ndarray]]:
+        rows, cols = alive.shape
+        size = self.tile
+        tiles = (-(-rows // size), -(-cols // size))
+        total = tiles[0] * tiles[1]
+
+        # padded[1 + r, 1 + c] is cell (r, c); the border and the cells past the
+        # board up to the next whole tile stay dead, as their counts are kept 0
+        padded = np.zeros((tiles[0] * size + 2, tiles[1] * size + 2), dtype=np.uint8)
+        padded[1 : rows + 1, 1 : cols + 1] = alive
+        board = padded[1:-1, 1:-1]
+        on_board = np.zeros(board.shape, dtype=np.uint8)
+        on_board[:rows, :cols] = 1
+        ragged = rows % size or cols % size
+        counts = self._count_windows(padded) * on_board
+        dying = self.dying(board, counts)
+
+        cells, counts_tiles, dying_tiles, board_tiles = (
+            self._blocks(board), self._blocks(counts), self._blocks(dying), self._blocks(on_board)
+        )
+        # the (tile + 2)^2 neighbourhood of every tile, as views into padded
+        windows = np.lib.stride_tricks.sliding_window_view(padded, (size + 2, size + 2))[::size, ::size]
+        ti, tj = np.nonzero(np.ones(tiles, dtype=bool))
+        # the active tiles' cells and counts, as left by the last count pass;
+        # None after a full board pass, when they are gathered instead
+        current: np.ndarray | None = None
+        tile_counts: np.ndarray | None = None
+
+        while True:
+            # active tiles are the ones around last generation's changes,
+            # which are also the ones whose counts were just recomputed
+            self.active_tiles = ti.size
+            if self.active_tiles != self._logged_tiles:
+                self._logged_tiles = self.active_tiles
+                tracelog("active tiles:", f"{self.active_tiles}/{total}")
+
+            if not self.active_tiles:
+                pass  # a still board stays as it is
+            elif self.active_tiles * self.full_pass_ratio > total:
+                new = self.advance(board, counts)
+                # one axis at a time: any() over two strided axes is far slower
+                diff = (new != board).reshape(tiles[0], size, -1).any(axis=1)
+                changed = diff.reshape(*tiles, size).any(axis=2)
+                board[...] = new
+                counts[...] = self._count_windows(padded)
+                if ragged:
+                    counts *= on_board
+                dying[...] = self.dying(board, counts)
+                ti, tj = np.nonzero(_dilate(changed))
+                current = tile_counts = None
+            else:
+                if current is None or tile_counts is None:
+                    current, tile_counts = cells[ti, tj], counts_tiles[ti, tj]
+                new = self.advance(current, tile_counts)
+                moved = (new != current).any(axis=(1, 2))
+                cells[ti[moved], tj[moved]] = new[moved]
+                changed = np.zeros(tiles, dtype=bool)
+                changed[ti[moved], tj[moved]] = True
+
+                # counts and dying only change around the tiles that changed
+                ti, tj = np.nonzero(_dilate(changed))
+                window = windows[ti, tj]
+                current = window[:, 1:-1, 1:-1]
+                tile_counts = self._count_windows(window)
+                if ragged:
+                    tile_counts *= board_tiles[ti, tj]
+                counts_tiles[ti, tj] = tile_counts
+                dying_tiles[ti, tj] = self.dying(current, tile_counts)
+
+            yield board[:rows, :cols], dying[:rows, :cols]
+
+    def _count_windows(self, windows: np.ndarray) -> np.ndarray:
+        """Return the neighbour counts of the inner cells of *windows* (the
+        padded board, or a stack of (tile + 2)^2 windows): row sums of
+        three, summed over three rows, minus the cell itself."""
+        across = windows[..., :, :-2] + windows[..., :, 1:-1]
+        across += windows[..., :, 2:]
+        num_alive = across[..., :-2, :] + across[..., 1:-1, :]
+        num_alive += across[..., 2:, :]
+        num_alive -= windows[..., 1:-1, 1:-1]
+        return num_alive
+
+
+def _full_add(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    t = a ^ b
+    return t ^ c, (a & b) | (t & c)
+
+
+def _half_add(a: np.ndarray, b: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return a ^ b, a & b
+
+
+class PackedStepper(Stepper):
+    """Bit-packed backend: 64 cells per uint64 word, counted with bitwise
+    adders so one numpy operation handles 64 cells at once."""
+
+    name = "packed"
+
+    def _pack(self, alive: np.ndarray) -> np.ndarray:
+        rows, cols = alive.shape
+        words = -(-cols // 64)
+        padded = np.zeros((rows, words * 64), dtype=np.uint8)
+        padded[:, :cols] = alive
+        packed = np.packbits(padded, axis=1, bitorder="little")
+        return packed.view("<u8")
+
+    def _unpack(self, packed: np.ndarray, cols: int) -> np.ndarray:
+        bits = np.unpackbits(packed.view(np.uint8), axis=1, count=cols, bitorder="little")
+        return bits
+
+    def count(self, alive: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        cells = self._pack(alive)
+        rows, words = cells.shape
+        one = np.uint64(1)
+        top = np.uint64(63)
+
+        # bit j of a word is column 64*k + j, so "west" means a left shift
+        west = cells << one
+        west[:, 1:] |= cells[:, :-1] >> top
+        east = cells >> one
+        east[:, :-1] |= cells[:, 1:] << top
+
+        zero = np.zeros((1, words), dtype=np.uint64)
+        row_sum0, row_sum1 = _full_add(west, cells, east)
+        above0 = np.concatenate((zero, row_sum0[:-1]))
+        above1 = np.concatenate((zero, row_sum1[:-1]))
+        below0 = np.concatenate((row_sum0[1:], zero))
+        below1 = np.concatenate((row_sum1[1:], zero))
+        mid0, mid1 = _half_add(west, east)
+
+        # weight 1 bits, then the weight 2 bits including the carry
+        sum0, carry = _full_add(above0, mid0, below0)
+        twos, fours_a = _full_add(above1, mid1, below1)
+        sum1, fours_b = _half_add(twos, carry)
+        at_least_4 = fours_a | fours_b
+
+        low = sum1 & ~at_least_4
+        eq2 = low & ~sum0
+        eq3 = low & sum0
+        return cells, eq2, eq3
+
+    def advance(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        cells, eq2, eq3 = counts  # type: ignore[misc]
+        return self._unpack(eq3 | (cells & eq2), alive.shape[1])
+
+    def dying(self, alive: np.ndarray, counts: object) -> np.ndarray:
+        cells, eq2, eq3 = counts  # type: ignore[misc]
+        return self._unpack(cells & ~(eq2 | eq3), alive.shape[1]).view(bool)
+
+
+STEPPERS: dict[str, type[Stepper]] = {
+    ConvolveStepper.name: ConvolveStepper,
+    SlicedStepper.name: SlicedStepper,
+    PackedStepper.name: PackedStepper,
+    TileStepper.name: TileStepper,
+}
+
+
+def get_stepper(name: str) -> Stepper:
+    try:
+        return STEPPERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown engine {name!r}. Choose from: {sorted(STEPPERS)}") from None
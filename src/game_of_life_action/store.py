@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import hashlib
+import struct
+from pathlib import Path
+from types import TracebackType
+from typing import BinaryIO
+
+import numpy as np
+
+# ---------------------------------------------------------------------------
+# Frame store
+# ---------------------------------------------------------------------------
+#
+# ``NAME.frames`` holds the generations an animation is made of, memory-mapped
+# so long animations are not kept in RAM and are read back only as frames are
+# encoded.  The header counts the generations written so far; it is updated
+# after their cells are flushed, so a cancelled run never claims more than it
+# stored.  A later run from the same board continues after the last written
+# generation, and one with the generations already stored (e.g. a re-encode in
+# another -format) does not step at all.
+#
+#   header : magic, version, rows, cols, generations written, source digest
+#   cells  : (generations, rows, cols) uint8 grids, 0 dead / 1 alive / 2 dying
+
+_MAGIC = b"GOLF"
+_VERSION = 1
+_HEADER = struct.Struct("<4sB2IQ16s")
+
+
+def source_digest(cells: np.ndarray) -> bytes:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(struct.pack("<2I", *cells.shape))
+    digest.update(np.ascontiguousarray(cells, dtype=np.uint8).tobytes())
+    return digest.digest()
+
+
+class FrameStore:
+    """The generations after *source* in *path*, room for at least
+    *generations* of them, see above."""
+
+    def __init__(self, path: Path, source: np.ndarray, generations: int) -> None:
+        rows, cols = source.shape
+        self.digest = source_digest(source)
+        self.written = self._read_written(path, rows, cols)
+        self._file: BinaryIO = open(path, "r+b" if self.written else "w+b")
+        if not self.written:
+            self._write_header(rows, cols)
+        capacity = max(generations, self.written, 1)
+        size = _HEADER.size + capacity * rows * cols
+        if self._file.seek(0, 2) < size:
+            self._file.truncate(size)
+        self.cells = np.memmap(
+            self._file, dtype=np.uint8, mode="r+", offset=_HEADER.size, shape=(capacity, rows, cols)
+        )
+
+    def __enter__(self) -> FrameStore:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def _read_written(self, path: Path, rows: int, cols: int) -> int:
+        """Return the generations stored in *path* for this source, or 0."""
+        try:
+            with open(path, "rb") as file:
+                data = file.read(_HEADER.size)
+        except OSError:
+            return 0
+        if len(data) < _HEADER.size:
+            return 0
+        magic, version, stored_rows, stored_cols, written, digest = _HEADER.unpack(data)
+        if magic != _MAGIC or version != _VERSION or digest != self.digest:
+            return 0
+        if (stored_rows, stored_cols) != (rows, cols):
+            return 0
+        return written
+
+    def _write_header(self, rows: int, cols: int) -> None:
+        self._file.seek(0)
+        self._file.write(_HEADER.pack(_MAGIC, _VERSION, rows, cols, self.written, self.digest))
+        self._file.flush()
+
+    def commit(self, written: int) -> None:
+        """Record that the first *written* generations are stored."""
+        self.cells.flush()
+        self.written = written
+        self._write_header(*self.cells.shape[1:])
+
+    def close(self) -> None:
+        """Close the file; ``cells`` stays mapped while it is referenced."""
+        self._file.close()
@@ -1,16 +1,30 @@
 from __future__ import annotations
 
 import base64
+import contextlib
+import importlib.util
 import io
 import json
 import os
+import re
 import shutil
 import socket
 import struct
 import subprocess
+import tempfile
+import threading
 import time
 import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Sequence
+
+from .tracing import tracelog
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 # ---------------------------------------------------------------------------
 # Chrome discovery
@@ -98,48 +112,67 @@ def _ws_connect(host: str, port: int, path: str) -> socket.socket:
     return sock
 
 
-def _recv_exactly(sock: socket.socket, n: int) -> bytes:
-    buf = b""
-    while len(buf) < n:
-        chunk = sock.recv(min(65536, n - len(buf)))
-        if not chunk:
+def _mask(data: bytes | bytearray | memoryview, key: bytes) -> bytes:
+    """XOR *data* with the repeated 4 byte *key*, as one big-integer operation."""
+    n = len(data)
+    pattern = (key * (n // 4 + 1))[:n]
+    return (int.from_bytes(data, "little") ^ int.from_bytes(pattern, "little")).to_bytes(n, "little")
+
+
+def _recv_into(sock: socket.socket, view: memoryview) -> None:
+    """Fill *view* from *sock*, without intermediate chunks."""
+    while view:
+        received = sock.recv_into(view)
+        if not received:
             raise RuntimeError("WebSocket connection closed unexpectedly")
-        buf += chunk
-    return buf
+        view = view[received:]
 
 
-def _ws_recv(sock: socket.socket) -> str:
-    """Receive one complete (possibly fragmented) WebSocket message."""
-    full_payload = b""
+def _ws_recv(sock: socket.socket) -> bytearray:
+    """Receive one complete (possibly fragmented) WebSocket message as raw
+    UTF-8; ``json.loads`` takes it as is.  Each frame's payload is received
+    straight into the message buffer."""
+    header = bytearray(8)
+    message = bytearray()
     while True:
-        header = _recv_exactly(sock, 2)
-        fin = (header[0] & 0x80) != 0
-        opcode = header[0] & 0x0F
-        masked = (header[1] & 0x80) != 0
-        length = header[1] & 0x7F
-        if length == 126:
-            length = struct.unpack("!H", _recv_exactly(sock, 2))[0]
-        elif length == 127:
-            length = struct.unpack("!Q", _recv_exactly(sock, 8))[0]
-        mask_key = _recv_exactly(sock, 4) if masked else b""
-        payload = _recv_exactly(sock, length)
-        if masked:
-            payload = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload))
+        with memoryview(header) as view:
+            _recv_into(sock, view[:2])
+            fin = (header[0] & 0x80) != 0
+            opcode = header[0] & 0x0F
+            masked = (header[1] & 0x80) != 0
+            length = header[1] & 0x7F
+            if length == 126:
+                _recv_into(sock, view[:2])
+                length = struct.unpack_from("!H", header)[0]
+            elif length == 127:
+                _recv_into(sock, view[:8])
+                length = struct.unpack_from("!Q", header)[0]
+            mask_key = b""
+            if masked:
+                _recv_into(sock, view[:4])
+                mask_key = bytes(header[:4])
         if opcode == 8:
             raise RuntimeError("WebSocket closed by server")
-        if opcode != 0:  # not a continuation frame
-            full_payload = payload
+        if opcode >= 8:  # ping/pong between fragments, not part of the message
+            with memoryview(bytearray(length)) as view:
+                _recv_into(sock, view)
+            continue
+        start = len(message)
+        if start:
+            message.extend(bytes(length))
         else:
-            full_payload += payload
+            message = bytearray(length)
+        with memoryview(message) as view:
+            _recv_into(sock, view[start:])
+        if masked:
+            message[start:] = _mask(memoryview(message)[start:], mask_key)
         if fin:
-            break
-    return full_payload.decode("utf-8")
+            return message
 
 
 def _ws_send(sock: socket.socket, message: str) -> None:
     data = message.encode("utf-8")
     mask = os.urandom(4)
-    masked = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
     length = len(data)
     if length <= 125:
         header = struct.pack("BB", 0x81, 0x80 | length) + mask
@@ -147,17 +180,7 @@ def _ws_send(sock: socket.socket, message: str) -> None:
         header = struct.pack("!BBH", 0x81, 0x80 | 126, length) + mask
     else:
         header = struct.pack("!BBQ", 0x81, 0x80 | 127, length) + mask
-    sock.sendall(header + masked)
-
-
-def _cdp_call(sock: socket.socket, cmd_id: list[int], method: str, params: dict | None = None) -> dict:
-    """Send one CDP command and return its result, discarding unrelated events."""
-    cmd_id[0] += 1
-    _ws_send(sock, json.dumps({"id": cmd_id[0], "method": method, "params": params or {}}))
-    while True:
-        msg = json.loads(_ws_recv(sock))
-        if msg.get("id") == cmd_id[0]:
-            return msg.get("result", {})
+    sock.sendall(header + _mask(data, mask))
 
 
 # ---------------------------------------------------------------------------
@@ -207,153 +230,447 @@ _METRICS_JS = """
 })()
 """
 
-_READY_JS = "document.readyState"
-
 
 # ---------------------------------------------------------------------------
-# Public API
+# Output geometry (shared by every rasteriser)
 # ---------------------------------------------------------------------------
 
-def svg_to_png(source: Path | str, out: Path) -> None:
-    """Convert an SVG *source* (local file path or HTTP/S URL) to a PNG at *out*.
-
-    Uses a headless Chrome subprocess driven via its DevTools Protocol over a
-    minimal stdlib WebSocket client.  No third-party packages required beyond
-    Pillow (already a project dependency).
-    """
+def _auto_scale(width: float, height: float) -> tuple[int, int]:
+    """Return the integer scale and crop margin for an SVG of *width* x
+    *height* CSS pixels."""
+    current_size_ratio = 0
+    metrics_width = width
+    metrics_height = height
+    while metrics_width * metrics_height < 555_000:
+        current_size_ratio += 1
+        metrics_width += width
+        metrics_height += height
+    print(f"current_size_ratio: {current_size_ratio}")
+    scale = max(1, current_size_ratio)
+    margin = 4 + current_size_ratio
+    print(f"Using scale {scale} ({width*scale}x{height*scale}) with margin {margin} ({width*scale-2*margin}x{height*scale-2*margin} final)")
+    return scale, margin
+
+
+def _aligned(size: int, cells: int) -> int:
+    """Return the largest length <= *size* that splits into whole cells of
+    the size the engine derives for *cells* cells (``ceil(length / cells)``)."""
+    while size > cells and size % -(-size // cells):
+        size -= 1
+    return size
+
+
+def _final_box(
+    width: int, height: int, margin: int, grid: tuple[int, int] | None
+) -> tuple[int, int, int, int]:
+    """Return the crop of a *width* x *height* render: the margin goes, odd
+    sizes lose a pixel and, with an explicit *grid*, partial cells at the
+    right and bottom edges are trimmed."""
+    right = width - margin - (width % 2)
+    bottom = height - margin - (height % 2)
+    if grid is not None:
+        bottom = margin + _aligned(bottom - margin, grid[0])
+        right = margin + _aligned(right - margin, grid[1])
+    return margin, margin, right, bottom
+
+
+def _to_image(png: bytes, width: int, height: int, margin: int, grid: tuple[int, int] | None) -> Image.Image:
+    """Decode the render *png* once and crop it to the final RGBA image."""
     from PIL import Image
 
-    out.parent.mkdir(parents=True, exist_ok=True)
-    url = source.as_uri() if isinstance(source, Path) else source
-    chrome = _find_chrome()
-
-    # Find a free port
-    with socket.socket() as _s:
-        _s.bind(("127.0.0.1", 0))
-        port = _s.getsockname()[1]
-
-    proc = subprocess.Popen(
-        [
-            chrome,
-            "--headless=new",
-            "--disable-gpu",
-            "--hide-scrollbars",
-            "--no-sandbox",
-            "--allow-file-access-from-files",
-            "--force-device-scale-factor=1",
-            "--window-size=1920,1080",
-            f"--remote-debugging-port={port}",
-            "about:blank",
-        ],
-        stdout=subprocess.DEVNULL,
-        stderr=subprocess.DEVNULL,
-    )
+    img = Image.open(io.BytesIO(png)).convert("RGBA")
+    if img.size != (width, height):  # not expected with whole-pixel clips
+        tracelog(f"render is {img.width}x{img.height} instead of {width}x{height}, resampling")
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return img.crop(_final_box(width, height, margin, grid))
 
-    # Give Chrome a moment to fail fast (e.g. bad binary, missing libs)
-    time.sleep(0.3)
-    rc = proc.poll()
-    if rc is not None:
-        raise RuntimeError(f"Chrome process exited immediately with code {rc}. Binary: {chrome!r}")
 
-    try:
-        # Wait for Chrome's DevTools HTTP endpoint
-        ws_path: str | None = None
-        for _ in range(40):
-            time.sleep(0.4)
+# ---------------------------------------------------------------------------
+# Renderer
+# ---------------------------------------------------------------------------
+#
+# One headless Chrome serves every conversion of a run.  Chrome is started with
+# an ephemeral DevTools port that it announces on stderr, and a single
+# WebSocket to the browser endpoint carries all commands: each SVG gets its own
+# target, attached as a flat session, so several conversions run at once over
+# that connection.  A reader thread hands command results to the waiting
+# callers and page events (load) to whoever registered for them, so nothing
+# polls or sleeps.
+
+_WINDOW = {"width": 1920, "height": 1080}
+
+
+class ChromeRenderer:
+    """Headless Chrome rendering SVG documents to PNG files, see above."""
+
+    def __init__(self, timeout: float = 30.0) -> None:
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._next_id = 0
+        self._pending: dict[int, tuple[str, Future]] = {}
+        self._waiters: list[tuple[str | None, str, Future]] = []
+        self._sock: socket.socket | None = None
+
+        self._chrome = _find_chrome()
+        self._profile = tempfile.TemporaryDirectory(prefix="gol-chrome-", ignore_cleanup_errors=True)
+        self._proc = subprocess.Popen(
+            [
+                self._chrome,
+                "--headless=new",
+                "--disable-gpu",
+                "--hide-scrollbars",
+                "--no-sandbox",
+                "--no-first-run",
+                "--allow-file-access-from-files",
+                "--force-device-scale-factor=1",
+                f"--window-size={_WINDOW['width']},{_WINDOW['height']}",
+                "--remote-debugging-port=0",
+                f"--user-data-dir={self._profile.name}",
+                "about:blank",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        endpoint: Future = Future()
+        threading.Thread(target=self._drain_stderr, args=(endpoint,), daemon=True).start()
+        try:
+            ws_url = endpoint.result(timeout)
+            host_port, ws_path = ws_url.removeprefix("ws://").split("/", 1)
+            host, port = host_port.rsplit(":", 1)
+            self._sock = _ws_connect(host, int(port), "/" + ws_path)
+        except BaseException as exc:
+            self.close()
+            if isinstance(exc, FutureTimeoutError):
+                raise RuntimeError("Chrome DevTools did not start in time") from None
+            raise
+        self._sock.settimeout(None)
+        threading.Thread(target=self._read_messages, daemon=True).start()
+
+    def __enter__(self) -> ChromeRenderer:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    # -- connection ---------------------------------------------------------
+
+    def _drain_stderr(self, endpoint: Future) -> None:
+        assert self._proc.stderr is not None
+        for line in self._proc.stderr:
+            text = line.decode(errors="replace").strip()
+            if not endpoint.done() and text.startswith("DevTools listening on "):
+                endpoint.set_result(text.removeprefix("DevTools listening on "))
+        if not endpoint.done():
+            endpoint.set_exception(RuntimeError(
+                f"Chrome process exited with code {self._proc.wait()}. Binary: {self._chrome!r}"
+            ))
+
+    def _read_messages(self) -> None:
+        assert self._sock is not None
+        try:
+            while True:
+                self._dispatch(json.loads(_ws_recv(self._sock)))
+        except Exception:
+            pass
+        with self._lock:
+            futures = [future for _, future in self._pending.values()]
+            futures += [future for _, _, future in self._waiters]
+            self._pending.clear()
+            self._waiters.clear()
+        for future in futures:
+            if not future.done():
+                future.set_exception(RuntimeError("Chrome DevTools connection closed"))
+
+    def _dispatch(self, msg: dict) -> None:
+        if "id" not in msg:
+            with self._lock:
+                events = [
+                    waiter for waiter in self._waiters
+                    if waiter[1] == msg.get("method") and waiter[0] == msg.get("sessionId")
+                ]
+                for waiter in events:
+                    self._waiters.remove(waiter)
+            for _, _, event in events:
+                event.set_result(msg.get("params", {}))
+            return
+        with self._lock:
+            if msg["id"] not in self._pending:
+                return
+            method, future = self._pending.pop(msg["id"])
+        if "error" in msg:
+            future.set_exception(RuntimeError(f"{method} failed: {msg['error'].get('message')}"))
+        else:
+            future.set_result(msg.get("result", {}))
+
+    def call(self, method: str, params: dict | None = None, session: str | None = None) -> dict:
+        """Send one CDP command (to *session*, or the browser) and return its result."""
+        future: Future = Future()
+        with self._lock:
+            self._next_id += 1
+            message: dict = {"id": self._next_id, "method": method, "params": params or {}}
+            self._pending[self._next_id] = (method, future)
+        if session:
+            message["sessionId"] = session
+        assert self._sock is not None
+        with self._send_lock:
+            _ws_send(self._sock, json.dumps(message))
+        return future.result(self.timeout)
+
+    def expect(self, method: str, session: str | None = None) -> Future:
+        """Return a future for the next *method* event of *session*.  Register
+        before sending the command that triggers it."""
+        future: Future = Future()
+        with self._lock:
+            self._waiters.append((session, method, future))
+        return future
+
+    def evaluate(self, expression: str, session: str) -> object:
+        result = self.call("Runtime.evaluate", {"expression": expression, "returnByValue": True}, session)
+        if "exceptionDetails" in result:
+            raise RuntimeError(f"SVG script failed: {result['exceptionDetails'].get('text')}")
+        return result.get("result", {}).get("value")
+
+    def close(self) -> None:
+        if self._sock is not None:
             try:
-                with urllib.request.urlopen(f"http://127.0.0.1:{port}/json") as resp:
-                    targets = json.loads(resp.read())
-                for t in targets:
-                    if t.get("type") == "page":
-                        ws_path = t["webSocketDebuggerUrl"].split(f":{port}", 1)[1]
-                        break
-                if ws_path:
-                    break
+                self.call("Browser.close")
+                self._proc.wait(5)
             except Exception:
-                continue
-
-        if not ws_path:
-            raise RuntimeError("Chrome DevTools did not start in time")
-
-        sock = _ws_connect("127.0.0.1", port, ws_path)
-        cmd_id: list[int] = [0]
-
+                pass
+            self._sock.close()
+            self._sock = None
+        if self._proc.poll() is None:
+            self._proc.terminate()
+            self._proc.wait()
+        self._profile.cleanup()
+
+    # -- rendering ----------------------------------------------------------
+
+    def render(self, source: Path | str, grid: tuple[int, int] | None = None) -> Image.Image:
+        """Render the SVG *source* (local file path or HTTP/S URL) to an RGBA
+        image, aligned to *grid* cells if given."""
+        url = source.as_uri() if isinstance(source, Path) else source
+
+        target = self.call("Target.createTarget", {"url": "about:blank", **_WINDOW})["targetId"]
         try:
-            # Enable Page events and navigate
-            _cdp_call(sock, cmd_id, "Page.enable")
-            _cdp_call(sock, cmd_id, "Page.navigate", {"url": url})
-
-            # Wait for document.readyState == "complete"
-            for _ in range(50):
-                time.sleep(0.2)
-                result = _cdp_call(sock, cmd_id, "Runtime.evaluate", {
-                    "expression": _READY_JS,
-                    "returnByValue": True,
-                })
-                if result.get("result", {}).get("value") == "complete":
-                    break
-
-            # Force animations to their final frame (same JS as selenium version)
-            _cdp_call(sock, cmd_id, "Runtime.evaluate", {"expression": _ANIMATION_JS})
-            time.sleep(0.1)
-
-            # Get SVG bounding box — retry until the SVG element is present
-            metrics: dict | None = None
-            for _ in range(20):
-                metrics_result = _cdp_call(sock, cmd_id, "Runtime.evaluate", {
-                    "expression": _METRICS_JS,
-                    "returnByValue": True,
-                })
-                if "exceptionDetails" in metrics_result:
-                    time.sleep(0.2)
-                    continue
-                raw = metrics_result.get("result", {}).get("value")
-                if raw is None:
-                    time.sleep(0.2)
-                    continue
-                metrics = json.loads(raw)
-                break
-            if metrics is None:
-                raise RuntimeError("SVG element not found or metrics JS failed after retries")
-
-            # Auto-scale:
-            current_size_ratio = 0
-            metrics_width = metrics['width']
-            metrics_height = metrics['height']
-            while metrics_width * metrics_height < 555_000:
-                current_size_ratio += 1
-                metrics_width += metrics['width']
-                metrics_height += metrics['height']
-            print(f"current_size_ratio: {current_size_ratio}")
-            # if not current_size_ratio and (metrics['width'] % 2 or metrics['height'] % 2):
-            #     current_size_ratio = 2  # Avoid odd sizes which can cause cropping issues
-            scale = max(1, current_size_ratio)
-            margin = 4 + current_size_ratio
-            print(f"SVG size: {metrics['width']}x{metrics['height']} at DPR {metrics['dpr']}")
-            print(f"Using scale {scale} ({metrics['width']*scale}x{metrics['height']*scale}) with margin {margin} ({metrics['width']*scale-2*margin}x{metrics['height']*scale-2*margin} final)")
+            session = self.call("Target.attachToTarget", {"targetId": target, "flatten": True})["sessionId"]
+            self.call("Page.enable", session=session)
+            loaded = self.expect("Page.loadEventFired", session)
+            navigation = self.call("Page.navigate", {"url": url}, session)
+            if navigation.get("errorText"):
+                raise RuntimeError(f"Could not load {url}: {navigation['errorText']}")
+            loaded.result(self.timeout)
+
+            # Force animations to their final frame; the screenshot below
+            # produces a new frame, so the paused styles are in it
+            self.evaluate(_ANIMATION_JS, session)
+            raw = self.evaluate(_METRICS_JS, session)
+            if raw is None:
+                raise RuntimeError("SVG element not found")
+            metrics = json.loads(raw)  # type: ignore[arg-type]
 
+            print(f"SVG size: {metrics['width']}x{metrics['height']} at DPR {metrics['dpr']}")
+            scale, margin = _auto_scale(metrics["width"], metrics["height"])
+            width, height = int(metrics["width"]), int(metrics["height"])
 
-            # Capture screenshot clipped to SVG bounds (CSS pixels)
-            screenshot = _cdp_call(sock, cmd_id, "Page.captureScreenshot", {
+            # Capture screenshot clipped to the SVG bounds, cut to whole CSS
+            # pixels so the capture is exactly width*scale x height*scale
+            screenshot = self.call("Page.captureScreenshot", {
                 "format": "png",
                 "clip": {
                     "x": metrics["x"],
                     "y": metrics["y"],
-                    "width": metrics["width"],
-                    "height": metrics["height"],
+                    "width": width,
+                    "height": height,
                     "scale": scale,
                 },
-            })
+            }, session)
         finally:
-            sock.close()
-
-        img = Image.open(io.BytesIO(base64.b64decode(screenshot["data"])))
-        exact_w = int(metrics["width"]) * scale
-        exact_h = int(metrics["height"]) * scale
-        if img.size != (exact_w, exact_h):
-            img = img.resize((exact_w, exact_h), Image.Resampling.LANCZOS)
-        img = img.crop((margin, margin, img.width - margin - (img.width % 2), img.height - margin - (img.height % 2)))
-        img.save(str(out), format="PNG")
-
-    finally:
-        proc.terminate()
+            with contextlib.suppress(Exception):  # keep the error that got us here
+                self.call("Target.closeTarget", {"targetId": target})
+
+        png = base64.b64decode(screenshot["data"])
+        return _to_image(png, width * scale, height * scale, margin, grid)
+
+    def _timed_render(self, source: Path | str, grid: tuple[int, int] | None) -> tuple[float, Image.Image]:
+        started = time.perf_counter()
+        image = self.render(source, grid)
+        return time.perf_counter() - started, image
+
+    def render_many(
+        self, sources: Sequence[Path | str], grid: tuple[int, int] | None = None
+    ) -> list[tuple[float, Image.Image]]:
+        """Render all *sources* concurrently, each in its own target, and
+        return how many seconds each one took with its image."""
+        with ThreadPoolExecutor(max(1, len(sources))) as pool:
+            futures = [pool.submit(self._timed_render, source, grid) for source in sources]
+            return [future.result() for future in futures]
+
+
+# ---------------------------------------------------------------------------
+# Native rasterisers
+# ---------------------------------------------------------------------------
+#
+# Static SVGs do not need a browser.  When one of these optional packages is
+# installed it renders them in-process, in the order listed; SVGs that only
+# come out right in a browser (scripts, event handlers, foreignObject HTML,
+# animations that must be played to their end) and any SVG a native backend
+# fails on still go to Chrome.
+
+_BROWSER_ONLY = re.compile(
+    rb"<script|<foreignObject|\son[a-z]+\s*=|<animate|<set\b|@keyframes|animation(-name)?\s*:",
+    re.IGNORECASE,
+)
+
+
+def needs_browser(data: bytes) -> bool:
+    """Tell whether the SVG *data* needs Chrome to render correctly."""
+    return _BROWSER_ONLY.search(data) is not None
+
+
+class Rasteriser:
+    """Renders static SVG bytes to PNG bytes at an integer *scale*."""
+
+    name = ""
+    module = ""
+
+    @classmethod
+    def available(cls) -> bool:
+        return importlib.util.find_spec(cls.module) is not None
+
+    def render(self, data: bytes, url: str, scale: int) -> bytes:
+        raise NotImplementedError
+
+    def render_image(self, data: bytes, url: str, grid: tuple[int, int] | None = None) -> Image.Image:
+        from PIL import Image
+
+        # a first pass at scale 1 gives the intrinsic size the scale depends on
+        png = self.render(data, url, 1)
+        width, height = Image.open(io.BytesIO(png)).size
+        print(f"SVG size: {width}x{height}")
+        scale, margin = _auto_scale(width, height)
+        if scale != 1:
+            png = self.render(data, url, scale)
+        return _to_image(png, width * scale, height * scale, margin, grid)
+
+
+class ResvgRasteriser(Rasteriser):
+    name = "resvg"
+    module = "resvg_py"
+
+    def render(self, data: bytes, url: str, scale: int) -> bytes:
+        import resvg_py  # type: ignore[import-not-found]
+
+        return bytes(resvg_py.svg_to_bytes(svg_string=data.decode("utf-8"), zoom=scale))
+
+
+class CairoRasteriser(Rasteriser):
+    name = "cairosvg"
+    module = "cairosvg"
+
+    def render(self, data: bytes, url: str, scale: int) -> bytes:
+        import cairosvg  # type: ignore[import-not-found]
+
+        return cairosvg.svg2png(bytestring=data, url=url, scale=scale)
+
+
+RASTERISERS: tuple[type[Rasteriser], ...] = (ResvgRasteriser, CairoRasteriser)
+
+
+def native_rasteriser(data: bytes) -> Rasteriser | None:
+    """Return the native backend for the SVG *data*, or None for Chrome."""
+    if needs_browser(data):
+        return None
+    for rasteriser in RASTERISERS:
+        if rasteriser.available():
+            return rasteriser()
+    return None
+
+
+def render_params(data: bytes, grid: tuple[int, int] | None = None) -> str:
+    """Everything besides the SVG itself that decides the rendered image;
+    part of the render cache key, so change it whenever a backend's output
+    does."""
+    rasteriser = native_rasteriser(data)
+    backend = rasteriser.name if rasteriser else "chrome:window=1920x1080:dpr=1:whole-css-px"
+    return f"{backend}:min-area=555000:margin=4+scale:even-crop:grid={grid}"
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def svg_to_png(source: Path | str, out: Path) -> None:
+    """Convert an SVG *source* (local file path or HTTP/S URL) to a PNG at *out*.
+
+    Static SVGs are rendered by a native backend when one is installed, the
+    rest by a headless Chrome subprocess driven via its DevTools Protocol over
+    a minimal stdlib WebSocket client.
+    """
+    svg_to_pngs([(source, out)])
+
+
+def svg_to_pngs(jobs: Sequence[tuple[Path | str, Path]]) -> None:
+    """Convert several ``(source, out)`` SVGs to PNG files, see render_svgs."""
+    for (_, out), (_, _, image) in zip(jobs, render_svgs([source for source, _ in jobs])):
+        out.parent.mkdir(parents=True, exist_ok=True)
+        image.save(str(out), format="PNG")
+
+
+def render_svgs(
+    sources: Sequence[Path | str],
+    contents: Sequence[bytes | None] | None = None,
+    grid: tuple[int, int] | None = None,
+) -> list[tuple[str, float, Image.Image]]:
+    """Render several SVG *sources* to RGBA images, *contents* being their
+    bytes if already read, with their size aligned to *grid* cells if given.
+    Native backends go first; whatever needs a browser is rendered with one
+    Chrome, concurrently.  Returns the backend, the seconds spent (Chrome's
+    startup included) and the image of each."""
+    results: list[tuple[str, float, Image.Image] | None] = [None] * len(sources)
+    browser_jobs: list[int] = []
+    for index, source in enumerate(sources):
+        data = contents[index] if contents is not None else None
+        try:
+            data = read_svg(source) if data is None else data
+        except OSError:
+            browser_jobs.append(index)
+            continue
+        rasteriser = native_rasteriser(data)
+        if rasteriser is None:
+            browser_jobs.append(index)
+            continue
+        started = time.perf_counter()
+        try:
+            image = rasteriser.render_image(data, source.as_uri() if isinstance(source, Path) else source, grid)
+        except Exception as exc:
+            tracelog(f"{rasteriser.name} failed on {source} ({exc}), falling back to chrome")
+            browser_jobs.append(index)
+            continue
+        results[index] = (rasteriser.name, time.perf_counter() - started, image)
+
+    if browser_jobs:
+        started = time.perf_counter()
+        with ChromeRenderer() as renderer:
+            startup = time.perf_counter() - started
+            rendered = renderer.render_many([sources[index] for index in browser_jobs], grid)
+        for index, (render_seconds, image) in zip(browser_jobs, rendered):
+            results[index] = ("chrome", startup + render_seconds, image)
+
+    for source, (backend, render_seconds, image) in zip(sources, results):  # type: ignore[misc]
+        tracelog(f"rendered {source} with {backend} in {render_seconds:.2f}s ({image.width}x{image.height})")
+    return results  # type: ignore[return-value]
+
+
+def read_svg(source: Path | str) -> bytes:
+    """Return the bytes of the SVG *source* (local file path or HTTP/S URL)."""
+    if isinstance(source, Path):
+        return source.read_bytes()
+    with urllib.request.urlopen(source, timeout=30) as resp:
+        return resp.read()
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sys
+
+
+def tracelog(
+    *args: object,
+    sep: str | None = " ",
+    end: str | None = "\n",
+    flush: bool = False,
+) -> None:
+    print("TraceLog:", *args, sep=sep, end=end, flush=flush)
+
+
+def peak_rss() -> int | None:
+    """Return the peak resident set size of this process in bytes, or None
+    where the platform does not report it."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def tracelog_peak_memory() -> None:
+    peak = peak_rss()
+    if peak is not None:
+        tracelog("peak memory:", f"{peak / 2**20:.1f} MiB")
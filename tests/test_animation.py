@@ -0,0 +1,55 @@
+import struct
+
+import pytest
+from PIL import Image
+
+from game_of_life_action.animation import WRITERS, get_writer
+
+
+def _durations(path):
+    """Return the delay (ms) of every frame of the animation at *path*."""
+    if path.suffix == ".webp":
+        # Pillow does not report WebP frame delays, read the ANMF headers
+        data = path.read_bytes()
+        durations = []
+        pos = 12
+        while pos < len(data):
+            kind, length = struct.unpack_from("<4sI", data, pos)
+            if kind == b"ANMF":
+                durations.append(int.from_bytes(data[pos + 20 : pos + 23], "little"))
+            pos += 8 + length + length % 2
+        return durations
+    with Image.open(path) as image:
+        durations = []
+        for index in range(image.n_frames):
+            image.seek(index)
+            durations.append(image.info["duration"])
+        return durations
+
+
+@pytest.mark.parametrize("name", sorted(WRITERS))
+def test_long_still_animation(tmp_path, name):
+    # a still board held far longer than one frame delay of any container
+    frame = Image.new("P", (20, 20))
+    frame.putpalette([255, 255, 255, 0, 0, 0])
+    with get_writer(name, tmp_path / "still") as writer:
+        handle = writer.encode(frame)
+        for _ in range(20000):
+            writer.write(handle, 100)
+    durations = _durations(writer.path)
+    assert sum(durations) == 20000 * 100
+    assert max(durations) <= writer.max_duration
+
+
+@pytest.mark.parametrize("name", sorted(WRITERS))
+def test_repeated_frames_merge(tmp_path, name):
+    black = Image.new("P", (20, 20))
+    black.putpalette([0, 0, 0, 255, 255, 255])
+    white = Image.new("P", (20, 20), 1)
+    white.putpalette([0, 0, 0, 255, 255, 255])
+    with get_writer(name, tmp_path / "blink") as writer:
+        first, second = writer.encode(black), writer.encode(white)
+        for handle in (first, first, second, first):
+            writer.write(handle, 100)
+    assert writer.frames_written == 3
+    assert _durations(writer.path) == [200, 100, 100]
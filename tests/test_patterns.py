@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+
+from game_of_life_action.patterns import read_cells, read_rle, write_cells, write_rle
+
+
+@pytest.mark.parametrize(("write", "read"), [(write_rle, read_rle), (write_cells, read_cells)])
+def test_export_round_trip(write, read):
+    cells = (np.random.default_rng(1).random((37, 91)) < 0.3).astype(np.uint8)
+    cells[:, -1] = 0  # trailing dead cells keep the grid size
+    cells[-1] = 0
+    assert np.array_equal(read(write(cells, ["generation 0"])), cells)
+
+
+def test_read_glider():
+    glider = np.array([[0, 1, 0], [0, 0, 1], [1, 1, 1]], dtype=np.uint8)
+    assert np.array_equal(read_rle("#N Glider\nx = 3, y = 3, rule = B3/S23\nbo$2bo$3o!\n"), glider)
+    assert np.array_equal(read_cells("!Name: Glider\n.O.\n..O\nOOO\n"), glider)
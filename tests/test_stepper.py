@@ -0,0 +1,55 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from game_of_life_action.config import Settings
+from game_of_life_action.engine import GameOfLifeEngine
+from game_of_life_action.stepper import STEPPERS
+
+GENERATIONS = 120
+
+
+def _boards():
+    rng = np.random.default_rng(7)
+    boards = [
+        (rng.random(shape) < density).astype(np.uint8)
+        for shape, density in [((84, 240), 0.5), ((84, 240), 0.05), ((3, 70), 0.5), ((100, 33), 0.3)]
+    ]
+    glider = np.zeros((40, 40), dtype=np.uint8)
+    glider[1, 2] = glider[2, 3] = 1
+    glider[3, 1:4] = 1
+    return [*boards, glider, np.ones((1, 1), dtype=np.uint8)]
+
+
+def _engine(name, tmp_path):
+    if name == "convolve":
+        pytest.importorskip("scipy")
+    color = (0, 0, 0, 255)
+    return GameOfLifeEngine(Settings(
+        tmp_path, color, color, color, (84, 240), (84, 240), None, 10, 100, None, None, engine=name
+    ))
+
+
+@pytest.mark.parametrize("name", sorted(STEPPERS))
+def test_iterate_game_matches_update_game(name, tmp_path):
+    engine = _engine(name, tmp_path)
+    for board in _boards():
+        expected = [cells.copy() for cells in itertools.islice(engine.update_game(board.copy()), GENERATIONS)]
+        generations = []
+        for cells in itertools.islice(engine.iterate_game(board), GENERATIONS):
+            assert not cells.flags.writeable
+            generations.append((cells, cells.copy()))
+        # every yielded array still holds its generation once the generator moved on
+        for want, (cells, seen) in zip(expected, generations, strict=True):
+            assert np.array_equal(seen, want)
+            assert np.array_equal(cells, seen)
+
+
+@pytest.mark.parametrize("name", sorted(STEPPERS))
+def test_simulate_matches_iterate_game(name, tmp_path):
+    engine = _engine(name, tmp_path)
+    for board in _boards():
+        stack = engine.simulate(board, GENERATIONS)
+        for want, cells in zip(stack, itertools.islice(engine.iterate_game(board), GENERATIONS), strict=True):
+            assert np.array_equal(cells, want)